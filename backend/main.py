@@ -1,9 +1,24 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from fastapi import FastAPI, HTTPException, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, FileResponse, Response
 import os
+import re
+import sys
+import uuid
 import asyncio
+import hashlib
+import logging
+import logging.handlers
+import queue
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
+import aiofiles
+import httpx
+import orjson
 from dotenv import load_dotenv
 
 from services.planning_service import PlanningService
@@ -13,14 +28,42 @@ from services.trip_service import TripService
 from services.marine_service import MarineService
 from models.schemas import *
 
-# Import video analyzer
-import sys
-sys.path.append(str(Path(__file__).parent / "sonar_assist"))
-from sonar_assist.video_analyzer import VideoSonarAnalyzer
-
 load_dotenv()
 
-app = FastAPI(title="LEVIATHAN API", version="1.0.0")
+# One pooled client for all outbound HTTP so upstream connections stay alive;
+# the transport retries failed connection attempts (not failed responses) twice
+http_client = httpx.AsyncClient(
+    timeout=10,
+    transport=httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=2,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    ),
+)
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Log records are queued by request handlers and written by a background
+    # thread, so slow stderr never blocks the event loop
+    log_queue = queue.SimpleQueue()
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    root_logger = logging.getLogger()
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    log_listener.start()
+
+    yield
+    await http_client.aclose()
+    video_pool.shutdown(wait=False, cancel_futures=True)
+    root_logger.removeHandler(queue_handler)
+    log_listener.stop()
+
+app = FastAPI(title="LEVIATHAN API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,13 +72,146 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Video/image bodies are excluded by default, so this only hits JSON and text
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
-planning_service = PlanningService()
-sonar_service = SonarService()
-freshness_service = FreshnessService()
+marine_service = MarineService(http_client=http_client)
+planning_service = PlanningService(marine_service=marine_service, http_client=http_client)
+sonar_service = SonarService(http_client=http_client)
+freshness_service = FreshnessService(http_client=http_client)
 trip_service = TripService()
-marine_service = MarineService()
-video_analyzer = VideoSonarAnalyzer()
+
+def init_video_worker():
+    """
+    Give each video worker its own stderr logging.
+
+    Forked workers inherit the parent's QueueHandler but not the listener
+    thread that drains it, so their records would pile up unread.
+    """
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format=LOG_FORMAT)
+
+# Video analysis is CPU-bound (decode + OpenCV), so it runs in worker processes
+video_pool = ProcessPoolExecutor(
+    max_workers=int(os.getenv("VIDEO_ANALYSIS_WORKERS", "2")),
+    initializer=init_video_worker,
+)
+
+@lru_cache(maxsize=1)
+def get_video_analysis_fn():
+    """Import the video analyzer on first use so OpenCV/SciPy aren't loaded at startup."""
+    # sonar_assist modules import their siblings by bare name since they double as scripts
+    sys.path.append(str(Path(__file__).parent / "sonar_assist"))
+    from sonar_assist.video_analyzer import analyze_video_file
+    return analyze_video_file
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+VIDEO_UPLOAD_DIR = os.path.join(UPLOAD_DIR, "videos")
+os.makedirs(VIDEO_UPLOAD_DIR, exist_ok=True)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+# Recommendations worth surfacing as key moments (large/tight/dense schools)
+KEY_MOMENT_RE = re.compile(r"\b(?:large|tight|dense)\b", re.IGNORECASE)
+MAX_KEY_MOMENTS = 10
+
+# Accepted upload extensions; the content itself is checked by sniff_media_type
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic"}
+VIDEO_EXTENSIONS = {".mp4", ".m4v", ".mov", ".webm", ".mkv", ".avi"}
+
+def sniff_media_type(header: bytes) -> Optional[str]:
+    """Identify an upload from its leading bytes rather than the client's content type."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if header[:4] == b"RIFF":
+        if header[8:12] == b"WEBP":
+            return "image/webp"
+        if header[8:12] == b"AVI ":
+            return "video/x-msvideo"
+    if header[4:8] == b"ftyp":
+        brand = header[8:12]
+        if brand in (b"heic", b"heix", b"mif1"):
+            return "image/heic"
+        return "video/quicktime" if brand == b"qt  " else "video/mp4"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video/webm"
+    return None
+
+async def check_upload_type(upload: UploadFile, kind: str, extensions: set, detail: str) -> None:
+    """Reject an upload with HTTP 415 unless its extension and magic bytes match `kind`."""
+    header = await upload.read(16)
+    await upload.seek(0)
+
+    media_type = sniff_media_type(header)
+    suffix = Path(upload.filename or "").suffix.lower()
+    if suffix not in extensions or media_type is None or not media_type.startswith(f"{kind}/"):
+        raise HTTPException(status_code=415, detail=detail)
+
+async def save_upload(upload: UploadFile, directory: str) -> str:
+    """
+    Stream an upload into `directory` under a content-addressed name.
+
+    The file is named after the SHA-256 of its bytes plus its (already
+    validated) extension, so client-supplied names never reach the
+    filesystem and re-uploading identical content reuses the stored copy.
+
+    Returns:
+        The stored filename
+    """
+    suffix = Path(upload.filename or "").suffix.lower()
+    tmp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    try:
+        f = await aiofiles.open(tmp_path, "wb")
+    except FileNotFoundError:
+        # Upload directory was removed while the server was running
+        os.makedirs(directory, exist_ok=True)
+        f = await aiofiles.open(tmp_path, "wb")
+
+    digest = hashlib.sha256()
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            await f.write(chunk)
+    except BaseException:
+        await f.close()
+        os.remove(tmp_path)
+        raise
+    await f.close()
+
+    filename = f"{digest.hexdigest()}{suffix}"
+    path = os.path.join(directory, filename)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+    return filename
+
+def drop_page_cache(path: str) -> None:
+    """
+    Tell the kernel the file's cached pages won't be read again.
+
+    Uploaded videos are read once by the analyzer; without the hint their
+    pages would linger and push hotter data out of the page cache. No-op on
+    platforms without posix_fadvise.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Report unexpected errors as a JSON 500; the traceback still reaches the server log."""
+    return JSONResponse(status_code=500, content={"detail": str(exc)})
 
 @app.get("/")
 async def root():
@@ -43,92 +219,68 @@ async def root():
 
 @app.post("/api/plan", response_model=PlanResponse)
 async def create_plan(request: PlanRequest):
-    try:
-        return await planning_service.create_plan(request)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await planning_service.create_plan(request)
 
 @app.post("/api/sonar/analyze", response_model=SonarResponse)
 async def analyze_sonar(request: SonarRequest):
-    try:
-        return await sonar_service.analyze_sonar(request)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await sonar_service.analyze_sonar(request)
 
 @app.post("/api/freshness/analyze", response_model=FreshnessResponse)
 async def analyze_freshness(request: FreshnessRequest):
-    try:
-        return await freshness_service.analyze_freshness(request)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await freshness_service.analyze_freshness(request)
 
 @app.get("/api/conditions", response_model=MarineConditions)
 async def get_marine_conditions(lat: float, lng: float):
-    try:
-        return await marine_service.get_conditions(lat, lng)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await marine_service.get_conditions(lat, lng)
 
 @app.post("/api/trips", response_model=TripLog)
 async def start_trip(request: TripStartRequest):
-    try:
-        return await trip_service.start_trip(request)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await trip_service.start_trip(request)
 
 @app.get("/api/trips", response_model=list[TripLog])
 async def get_trips():
-    try:
-        return await trip_service.get_trips()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await trip_service.get_trips()
+
+@app.get("/api/trips/stats", response_model=CatchStats)
+async def get_catch_stats():
+    """All catches as parallel columns, for charts and aggregations."""
+    return await trip_service.get_catch_stats()
 
 @app.get("/api/trips/{trip_id}", response_model=TripLog)
 async def get_trip(trip_id: str):
-    try:
-        return await trip_service.get_trip(trip_id)
-    except Exception as e:
+    trip = await trip_service.get_trip(trip_id)
+    if trip is None:
         raise HTTPException(status_code=404, detail="Trip not found")
+    return trip
 
 @app.patch("/api/trips/{trip_id}", response_model=TripLog)
 async def update_trip(trip_id: str, updates: TripUpdateRequest):
-    try:
-        return await trip_service.update_trip(trip_id, updates)
-    except Exception as e:
+    trip = await trip_service.update_trip(trip_id, updates)
+    if trip is None:
         raise HTTPException(status_code=404, detail="Trip not found")
+    return trip
 
 @app.post("/api/trips/{trip_id}/end", response_model=TripLog)
 async def end_trip(trip_id: str):
-    try:
-        return await trip_service.end_trip(trip_id)
-    except Exception as e:
+    trip = await trip_service.end_trip(trip_id)
+    if trip is None:
         raise HTTPException(status_code=404, detail="Trip not found")
+    return trip
 
 @app.post("/api/trips/{trip_id}/catches", response_model=CatchRecord)
 async def add_catch(trip_id: str, catch_record: CatchCreateRequest):
-    try:
-        return await trip_service.add_catch(trip_id, catch_record)
-    except Exception as e:
+    catch = await trip_service.add_catch(trip_id, catch_record)
+    if catch is None:
         raise HTTPException(status_code=404, detail="Trip not found")
+    return catch
 
 @app.post("/api/upload")
 async def upload_image(image: UploadFile = File(...)):
-    try:
-        if not image.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
+    await check_upload_type(image, "image", IMAGE_EXTENSIONS, "File must be an image")
 
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
+    filename = await save_upload(image, UPLOAD_DIR)
 
-        file_path = os.path.join(upload_dir, image.filename)
-        content = await image.read()
-
-        with open(file_path, "wb") as f:
-            f.write(content)
-
-        return {"url": f"/uploads/{image.filename}"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {"url": f"/uploads/{filename}"}
 
 @app.post("/api/sonar/analyze-video")
 async def analyze_sonar_video(video: UploadFile = File(...)):
@@ -136,74 +288,94 @@ async def analyze_sonar_video(video: UploadFile = File(...)):
     Upload and analyze a sonar video.
     Returns frame-by-frame detections and an annotated video.
     """
+    # Validate file type
+    await check_upload_type(video, "video", VIDEO_EXTENSIONS, "File must be a video")
+
+    # Save uploaded video
+    filename = await save_upload(video, VIDEO_UPLOAD_DIR)
+    input_path = os.path.join(VIDEO_UPLOAD_DIR, filename)
+
+    # Generate output filename
+    output_filename = f"analyzed_{Path(filename).stem}.mp4"
+    output_path = os.path.join(VIDEO_UPLOAD_DIR, output_filename)
+
+    # Analyze video into a private temp file (identical uploads share an output
+    # name, so concurrent analyses must not write the same path), then swap it in
+    tmp_output_path = os.path.join(VIDEO_UPLOAD_DIR, f".{uuid.uuid4().hex}_{output_filename}")
+    loop = asyncio.get_running_loop()
     try:
-        # Validate file type
-        if not video.content_type.startswith('video/'):
-            raise HTTPException(status_code=400, detail="File must be a video")
-
-        # Create upload directory
-        upload_dir = "uploads/videos"
-        os.makedirs(upload_dir, exist_ok=True)
-
-        # Save uploaded video
-        input_path = os.path.join(upload_dir, video.filename)
-        content = await video.read()
-
-        with open(input_path, "wb") as f:
-            f.write(content)
-
-        # Generate output filename
-        output_filename = f"analyzed_{Path(video.filename).stem}.mp4"
-        output_path = os.path.join(upload_dir, output_filename)
-
-        # Analyze video
-        detections = await video_analyzer.analyze_video(
-            video_path=input_path,
-            output_path=output_path,
-            enable_tts=False,
-            enable_groq=True
+        detections = await loop.run_in_executor(
+            video_pool,
+            get_video_analysis_fn(),
+            input_path,
+            tmp_output_path,
+            False,  # enable_tts
+            True,  # enable_groq
         )
+        os.replace(tmp_output_path, output_path)
+    finally:
+        if os.path.exists(tmp_output_path):
+            os.remove(tmp_output_path)
+    # The source video is done with; keep the annotated output cached for playback
+    drop_page_cache(input_path)
+
+    # Summary statistics and key moments (frames with large schools) in one pass
+    frames_with_fish = 0
+    total_detections = 0
+    key_moments = []
+    for d in detections:
+        if d['detections']:
+            frames_with_fish += 1
+            total_detections += len(d['detections'])
+
+        if (len(key_moments) < MAX_KEY_MOMENTS and d['recommendation']
+                and KEY_MOMENT_RE.search(d['recommendation'])):
+            key_moments.append({
+                'frame': d['frame'],
+                'timestamp': d['timestamp'],
+                'recommendation': d['recommendation']
+            })
+
+    payload = {
+        "success": True,
+        "video_url": f"/uploads/videos/{filename}",
+        "analyzed_video_url": f"/uploads/videos/{output_filename}",
+        "summary": {
+            "total_frames": len(detections),
+            "frames_with_fish": frames_with_fish,
+            "total_detections": total_detections,
+            "avg_detections_per_frame": round(total_detections / len(detections), 2) if detections else 0
+        },
+        "key_moments": key_moments,
+        "all_detections": detections
+    }
+
+    # all_detections can hold thousands of frame records; hand the bytes back
+    # directly instead of walking them through jsonable_encoder + json.dumps
+    return Response(
+        content=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
+    )
 
-        # Calculate summary statistics
-        frames_with_fish = sum(1 for d in detections if d['detections'])
-        total_detections = sum(len(d['detections']) for d in detections)
-
-        # Extract key moments (frames with large schools)
-        key_moments = []
-        for d in detections:
-            if d['recommendation'] and any(keyword in d['recommendation'].lower()
-                                          for keyword in ['large', 'tight', 'dense']):
-                key_moments.append({
-                    'frame': d['frame'],
-                    'timestamp': d['timestamp'],
-                    'recommendation': d['recommendation']
-                })
-
-        return {
-            "success": True,
-            "video_url": f"/uploads/videos/{video.filename}",
-            "analyzed_video_url": f"/uploads/videos/{output_filename}",
-            "summary": {
-                "total_frames": len(detections),
-                "frames_with_fish": frames_with_fish,
-                "total_detections": total_detections,
-                "avg_detections_per_frame": round(total_detections / len(detections), 2) if detections else 0
-            },
-            "key_moments": key_moments[:10],  # Top 10 key moments
-            "all_detections": detections
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/uploads/videos/{filename}")
 async def get_video(filename: str):
     """Serve uploaded or analyzed videos."""
-    file_path = f"uploads/videos/{filename}"
+    file_path = os.path.join(VIDEO_UPLOAD_DIR, filename)
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Video not found")
     return FileResponse(file_path)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    debug = os.getenv("DEBUG", "False").lower() == "true"
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        reload=debug,
+        # Trips are stored in memory per process, so extra workers are opt-in
+        workers=None if debug else int(os.getenv("WEB_CONCURRENCY", "1")),
+    )
@@ -1,7 +1,32 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 
+__all__ = [
+    "MarineConditions",
+    "LocationModel",
+    "PlanRequest",
+    "BiteWindow",
+    "HourlyForecast",
+    "FishermanForecast",
+    "PlanResponse",
+    "SonarMetadata",
+    "SonarRequest",
+    "DetectedObjects",
+    "SonarResponse",
+    "FreshnessRequest",
+    "MarketValue",
+    "FreshnessResponse",
+    "CatchRecord",
+    "CatchCreateRequest",
+    "TripLog",
+    "CatchStats",
+    "TripStartRequest",
+    "TripUpdateRequest",
+]
+
 class MarineConditions(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     wind_speed: float
     wind_direction: str
     wave_height: float
@@ -10,15 +35,21 @@ class MarineConditions(BaseModel):
     temperature: float
 
 class LocationModel(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     lat: float
     lng: float
 
 class PlanRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     location: LocationModel
     target_species: Optional[List[str]] = None
     trip_duration: Optional[int] = None
 
 class BiteWindow(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     label: str  # e.g., "Dawn Window", "Late Morning", "Plan B"
     window: str  # e.g., "5:20 AM - 7:40 AM"
     action: str  # e.g., "Drop metal jigs on reef peak"
@@ -26,6 +57,8 @@ class BiteWindow(BaseModel):
     confidence: str  # "High", "Medium", "Low", "Contingency"
 
 class HourlyForecast(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     label: str  # e.g., "Now", "07:00"
     time: str  # e.g., "5:30 AM"
     wind: str  # e.g., "NW 8 kt"
@@ -37,6 +70,8 @@ class HourlyForecast(BaseModel):
     temperature: Optional[int] = None  # e.g., 60 (Fahrenheit)
 
 class FishermanForecast(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     location_name: str  # e.g., "Coastal Shelf"
     condition_summary: str  # e.g., "Calm dawn seas with light NW windline building after lunch."
     sea_surface_temp: int  # e.g., 56
@@ -50,6 +85,8 @@ class FishermanForecast(BaseModel):
     hourly: List[HourlyForecast]
 
 class PlanResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     target_species: str
     depth_band: str
     time_window: str
@@ -62,20 +99,28 @@ class PlanResponse(BaseModel):
     forecast: Optional[FishermanForecast] = None
 
 class SonarMetadata(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     depth: Optional[float] = None
     timestamp: Optional[str] = None
 
 class SonarRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     image: str  # base64 encoded image
     sonar_type: Optional[str] = None
     metadata: Optional[SonarMetadata] = None
 
 class DetectedObjects(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     fish_arches: int
     bottom_structure: bool
     thermocline: Optional[float] = None
 
 class SonarResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     depth: float
     density: str  # 'sparse' | 'moderate' | 'dense'
     school_width: str  # e.g., '20 ft'
@@ -91,15 +136,21 @@ class SonarResponse(BaseModel):
     species_guess: Optional[str] = None
 
 class FreshnessRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     image: str  # base64 encoded image
     species: Optional[str] = None
     capture_time: Optional[str] = None
 
 class MarketValue(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     estimated_price: float
     quality_factors: List[str]
 
 class FreshnessResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     bleeding: float
     ice_contact: float
     bruising: float
@@ -110,6 +161,8 @@ class FreshnessResponse(BaseModel):
     market_value: MarketValue
 
 class CatchRecord(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     timestamp: str
     species: str
@@ -121,6 +174,8 @@ class CatchRecord(BaseModel):
     location: LocationModel
 
 class CatchCreateRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     timestamp: str
     species: str
     weight: Optional[float] = None
@@ -131,6 +186,7 @@ class CatchCreateRequest(BaseModel):
     location: LocationModel
 
 class TripLog(BaseModel):
+    # Not frozen: TripService updates trips in place
     id: str
     start_time: str
     end_time: Optional[str] = None
@@ -140,11 +196,31 @@ class TripLog(BaseModel):
     fuel_used: Optional[float] = None
     notes: Optional[str] = None
 
+class CatchStats(BaseModel):
+    """Every catch across all trips, one list per field (row i = catch i)."""
+    model_config = ConfigDict(frozen=True)
+
+    trip_id: List[str] = []
+    catch_id: List[str] = []
+    timestamp: List[str] = []
+    species: List[str] = []
+    weight: List[Optional[float]] = []
+    length: List[Optional[float]] = []
+    depth: List[float] = []
+    lat: List[float] = []
+    lng: List[float] = []
+    freshness_overall: List[Optional[float]] = []
+    freshness_grade: List[Optional[str]] = []
+
 class TripStartRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     start_time: str
     location: LocationModel
 
 class TripUpdateRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     end_time: Optional[str] = None
     fuel_used: Optional[float] = None
     notes: Optional[str] = None
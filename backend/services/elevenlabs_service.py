@@ -3,17 +3,40 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+import httpx
 from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
+from elevenlabs.client import AsyncElevenLabs, ElevenLabs
 from elevenlabs.play import play
 
 
 logger = logging.getLogger(__name__)
 
+# Account voices rarely change, so list_voices() results are reused this long
+VOICE_CACHE_TTL_SEC = 300
+
+# Matches the SDK's own default request timeout
+HTTP_TIMEOUT_SEC = 240
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20)
+
+
+@functools.cache
+def _shared_http_client() -> httpx.Client:
+    """One keep-alive HTTP/2 connection pool for every blocking ElevenLabs call."""
+    return httpx.Client(http2=True, timeout=HTTP_TIMEOUT_SEC, limits=HTTP_LIMITS)
+
+
+@functools.cache
+def _shared_async_http_client() -> httpx.AsyncClient:
+    """Async counterpart of _shared_http_client, reused by every service instance."""
+    return httpx.AsyncClient(http2=True, timeout=HTTP_TIMEOUT_SEC, limits=HTTP_LIMITS)
+
+
 class ElevenLabsService:
     """Lightweight ElevenLabs Text-to-Speech client wrapper."""
 
@@ -21,6 +44,7 @@ class ElevenLabsService:
         self,
         api_key: Optional[str] = None,
         model_id: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
     ) -> None:
         # Hackathon defaults - hardcoded for quick testing
         self._api_key = (
@@ -35,7 +59,14 @@ class ElevenLabsService:
             )
 
         self._model_id = model_id or os.getenv("ELEVENLABS_MODEL", "eleven_multilingual_v2")
-        self._client = ElevenLabs(api_key=self._api_key)
+        self._client = ElevenLabs(api_key=self._api_key, httpx_client=_shared_http_client())
+        self._async_client = AsyncElevenLabs(
+            api_key=self._api_key,
+            httpx_client=http_client or _shared_async_http_client(),
+        )
+
+        self._voice_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+        self._voice_cache_lock = asyncio.Lock()
 
     def synthesize_speech(
         self,
@@ -54,16 +85,43 @@ class ElevenLabsService:
             output_format=output_format,
         )
 
+    async def stream_speech(
+        self,
+        text: str,
+        voice_id: str,
+        *,
+        model_id: Optional[str] = None,
+        output_format: Optional[str] = "mp3_44100_128",
+    ) -> AsyncIterator[bytes]:
+        """Yield audio chunks for the given text as ElevenLabs produces them."""
+
+        async for chunk in self._async_client.text_to_speech.stream(
+            text=text,
+            voice_id=voice_id,
+            model_id=model_id or self._model_id,
+            output_format=output_format,
+        ):
+            if chunk:
+                yield chunk
+
     async def list_voices(self) -> List[Dict[str, Any]]:
         """Return metadata for voices available to the account."""
 
-        return await asyncio.to_thread(self._list_voices)
+        async with self._voice_cache_lock:
+            if self._voice_cache is not None:
+                fetched_at, voice_entries = self._voice_cache
+                if time.monotonic() - fetched_at < VOICE_CACHE_TTL_SEC:
+                    return list(voice_entries)
+
+            voice_entries = await self._fetch_voices()
+            self._voice_cache = (time.monotonic(), voice_entries)
+            return list(voice_entries)
 
-    def _list_voices(self) -> List[Dict[str, Any]]:
-        voices = self._client.voices.get_all()
+    async def _fetch_voices(self) -> List[Dict[str, Any]]:
+        response = await self._async_client.voices.get_all()
 
         voice_entries: List[Dict[str, Any]] = []
-        for voice in voices:
+        for voice in response.voices:
             voice_entries.append(
                 {
                     "voice_id": getattr(voice, "voice_id", None),
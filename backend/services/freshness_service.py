@@ -1,35 +1,25 @@
 import os
+import asyncio
 import base64
-import re
-import json
-from datetime import datetime
-from typing import Dict, Any
-import google.generativeai as genai
+import io
+import logging
+import time
+from typing import Dict, Any, List, Optional, Set, Tuple
+import httpx
+import orjson
+from PIL import Image
+from pydantic import BaseModel
 from models.schemas import FreshnessRequest, FreshnessResponse, MarketValue
+from services.gemini_service import get_gemini_model
 
-class FreshnessService:
-    def __init__(self):
-        # Initialize Gemini API
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+logger = logging.getLogger(__name__)
 
-    async def analyze_freshness(self, request: FreshnessRequest) -> FreshnessResponse:
-        # Try local model first (will always fail as we don't have one running)
-        try:
-            return await self._call_local_model_freshness(request)
-        except Exception as local_error:
-            print(f"Local model unavailable, falling back to Gemini: {local_error}")
-            # Fall through to Gemini
+# Micro-batching: images arriving within FRESHNESS_BATCH_MS of each other share
+# one Gemini call, up to FRESHNESS_BATCH_SIZE images per call
+FRESHNESS_BATCH_SIZE = int(os.getenv('FRESHNESS_BATCH_SIZE', '8'))
+FRESHNESS_BATCH_MS = int(os.getenv('FRESHNESS_BATCH_MS', '50'))
 
-        try:
-            # Decode base64 image
-            image_data = base64.b64decode(request.image_data.split(',')[1] if ',' in request.image_data else request.image_data)
-
-            # Create the prompt for Gemini
-            prompt = """You are an expert fish quality assessor for commercial fishing operations. Analyze this fish image and provide a detailed freshness assessment.
+_FRESHNESS_PROMPT = """You are an expert fish quality assessor for commercial fishing operations. Analyze this fish image and provide a detailed freshness assessment.
 
 Evaluate the following criteria on a scale of 0-100:
 1. **Bleeding** (0-100): How well was the fish bled? Look for blood removal completeness, proper technique signs.
@@ -59,23 +49,93 @@ Respond ONLY with valid JSON in this exact format:
   "quality_factors": ["Excellent bleeding", "Good ice contact", "Minimal bruising"]
 }"""
 
-            # Call Gemini API with image
-            response = self.model.generate_content([
-                prompt,
-                {"mime_type": "image/jpeg", "data": image_data}
-            ])
+_BATCH_INSTRUCTIONS = """
+
+You are given {count} separate fish images. Assess each one independently as described above and respond ONLY with a JSON array of {count} objects in that format, in the same order as the images."""
 
-            # Parse response
-            result_text = response.text.strip()
+# Images are shrunk to fit this box before upload; Gemini bills and
+# slows down per image token, which scales with pixel count
+MAX_IMAGE_SIDE = 1024
+JPEG_QUALITY = 85
 
-            # Extract JSON from markdown code blocks if present
-            if "```json" in result_text:
-                result_text = re.search(r'```json\s*(.*?)\s*```', result_text, re.DOTALL).group(1)
-            elif "```" in result_text:
-                result_text = re.search(r'```\s*(.*?)\s*```', result_text, re.DOTALL).group(1)
+class _FreshnessAnalysis(BaseModel):
+    """Shape Gemini is constrained to return for each image."""
+    bleeding: int
+    ice_contact: int
+    bruising: int
+    overall: int
+    grade: str
+    next_action: str
+    estimated_price: float
+    quality_factors: List[str]
 
-            # Parse JSON
-            analysis = json.loads(result_text)
+# JSON mode: Gemini replies with bare JSON matching the schema, never a markdown fence
+_SINGLE_IMAGE_CONFIG = {"response_mime_type": "application/json", "response_schema": _FreshnessAnalysis}
+_BATCH_CONFIG = {"response_mime_type": "application/json", "response_schema": list[_FreshnessAnalysis]}
+
+# Returned when the image can't be analyzed; only the timestamp changes per call
+_FALLBACK_RESPONSE = FreshnessResponse(
+    bleeding=70,
+    ice_contact=70,
+    bruising=70,
+    overall=70,
+    grade='B',
+    next_action="Unable to fully analyze image. Ensure good ice contact and proper bleeding.",
+    timestamp="",
+    market_value=MarketValue(
+        estimated_price=8.00,
+        quality_factors=["Analysis incomplete - maintain standard handling practices"]
+    )
+)
+
+def _utc_timestamp() -> str:
+    """ISO-8601 UTC timestamp (second precision), matching the frontend's toISOString."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+def _prepare_image(image_data: bytes) -> bytes:
+    """Downscale to MAX_IMAGE_SIDE and re-encode as JPEG (what the prompt declares)."""
+    img = Image.open(io.BytesIO(image_data))
+    if img.format == 'JPEG' and max(img.size) <= MAX_IMAGE_SIDE:
+        return image_data
+
+    img.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    buf = io.BytesIO()
+    img.save(buf, 'JPEG', quality=JPEG_QUALITY)
+    return buf.getvalue()
+
+class FreshnessService:
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        # Initialize Gemini API
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        self.model = get_gemini_model('gemini-2.0-flash-exp', api_key)
+        self._http = http_client or httpx.AsyncClient(timeout=10)
+        # Optional Ollama-style endpoint, e.g. http://localhost:11434/api/generate
+        self._local_model_url = os.getenv('LOCAL_MODEL_URL')
+        # Pending (image bytes, future) pairs; the batcher task starts on first use
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def analyze_freshness(self, request: FreshnessRequest) -> FreshnessResponse:
+        # Try the local model first when one is configured
+        if self._local_model_url:
+            try:
+                return await self._call_local_model_freshness(request)
+            except Exception as local_error:
+                logger.info("Local model unavailable, falling back to Gemini: %s", local_error)
+                # Fall through to Gemini
+
+        try:
+            # Decode base64 image
+            head, sep, tail = request.image.partition(',')
+            image_data = base64.b64decode(tail if sep else head)
+            image_data = await asyncio.to_thread(_prepare_image, image_data)
+
+            analysis = await self._analyze_batched(image_data)
 
             # Construct response
             return FreshnessResponse(
@@ -85,43 +145,90 @@ Respond ONLY with valid JSON in this exact format:
                 overall=analysis['overall'],
                 grade=analysis['grade'],
                 next_action=analysis['next_action'],
-                timestamp=datetime.now().isoformat(),
+                timestamp=_utc_timestamp(),
                 market_value=MarketValue(
                     estimated_price=analysis['estimated_price'],
                     quality_factors=analysis['quality_factors']
                 )
             )
 
-        except Exception as e:
+        except Exception:
             # Fallback to reasonable defaults on error
-            print(f"Error analyzing freshness: {str(e)}")
-            return FreshnessResponse(
-                bleeding=70,
-                ice_contact=70,
-                bruising=70,
-                overall=70,
-                grade='B',
-                next_action="Unable to fully analyze image. Ensure good ice contact and proper bleeding.",
-                timestamp=datetime.now().isoformat(),
-                market_value=MarketValue(
-                    estimated_price=8.00,
-                    quality_factors=["Analysis incomplete - maintain standard handling practices"]
-                )
+            logger.exception("Error analyzing freshness")
+            return _FALLBACK_RESPONSE.model_copy(
+                update={"timestamp": _utc_timestamp()}
             )
 
+    async def _analyze_batched(self, image_data: bytes) -> Dict[str, Any]:
+        """Queue an image for the next Gemini batch and wait for its assessment."""
+        if self._batcher is None or self._batcher.done():
+            self._batch_queue = asyncio.Queue()
+            self._batcher = asyncio.create_task(self._run_batches())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((image_data, future))
+        return await future
+
+    async def _run_batches(self):
+        """Collect queued images into batches and resolve each caller's future."""
+        while True:
+            batch = [await self._batch_queue.get()]
+            deadline = time.monotonic() + FRESHNESS_BATCH_MS / 1000
+            while len(batch) < FRESHNESS_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Send the batch without waiting so the next one can start collecting
+            task = asyncio.create_task(self._resolve_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _resolve_batch(self, batch: List[Tuple[bytes, asyncio.Future]]):
+        try:
+            results = await self._analyze_images([image for image, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _analyze_images(self, images: List[bytes]) -> List[Dict[str, Any]]:
+        """Assess one or more images with a single Gemini call."""
+        prompt = _FRESHNESS_PROMPT
+        if len(images) > 1:
+            prompt += _BATCH_INSTRUCTIONS.format(count=len(images))
+
+        response = await self.model.generate_content_async(
+            [prompt] + [{"mime_type": "image/jpeg", "data": image} for image in images],
+            generation_config=_SINGLE_IMAGE_CONFIG if len(images) == 1 else _BATCH_CONFIG,
+        )
+        analysis = orjson.loads(response.text)
+
+        if len(images) == 1:
+            return [analysis[0] if isinstance(analysis, list) else analysis]
+        if not isinstance(analysis, list) or len(analysis) != len(images):
+            raise ValueError(f"Expected {len(images)} assessments from Gemini, got {analysis!r:.200}")
+        return analysis
+
     async def _call_local_model_freshness(self, request: FreshnessRequest) -> FreshnessResponse:
-        """Attempt to call local model for freshness analysis (will always fail)"""
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                'http://localhost:11434/api/generate',  # Ollama-style endpoint
-                json={
-                    'model': 'llama3-vision',
-                    'prompt': 'Analyze fish freshness',
-                    'images': [request.image_data]
-                },
-                timeout=aiohttp.ClientTimeout(total=2)
-            ) as resp:
-                if resp.status != 200:
-                    raise Exception("Local model not available")
-                return await resp.json()
\ No newline at end of file
+        """Attempt to call the local model at LOCAL_MODEL_URL for freshness analysis"""
+        resp = await self._http.post(
+            self._local_model_url,  # Ollama-style endpoint
+            json={
+                'model': 'llama3-vision',
+                'prompt': 'Analyze fish freshness',
+                'images': [request.image]
+            },
+            timeout=2
+        )
+        if resp.status_code != 200:
+            raise Exception("Local model not available")
+        return resp.json()
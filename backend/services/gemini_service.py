@@ -2,9 +2,20 @@
 
 import os
 import logging
+from functools import lru_cache
+from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+@lru_cache(maxsize=8)
+def get_gemini_model(model_name: str, api_key: Optional[str] = None) -> genai.GenerativeModel:
+    """Return the process-wide GenerativeModel for a model name, configuring the SDK on first use."""
+    api_key = api_key or os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in environment variables")
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
 class GeminiService:
     """Lightweight Gemini AI client wrapper."""
 
@@ -14,18 +25,23 @@ class GeminiService:
         if self._api_key == "your_gemini_api_key_here":
             raise ValueError("GEMINI_API_KEY not set. Add it to your .env file.")
         
-        # Configure Gemini
-        genai.configure(api_key=self._api_key)
-        
         # Set model (default to flash for speed)
         self._model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
-        self._model = genai.GenerativeModel(self._model_name)
+        self._model = get_gemini_model(self._model_name, self._api_key)
 
     def generate_text(self, prompt: str) -> str:
         """Generate text from a prompt."""
         response = self._model.generate_content(prompt)
         return response.text.strip()
 
+    async def stream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the response to a prompt as Gemini produces it."""
+        response = await self._model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            # chunk.text raises on chunks with no parts (e.g. the final finish-reason chunk)
+            if chunk.parts:
+                yield chunk.text
+
     def chat(self, messages: list) -> str:
         """Chat with context. Pass list of dicts with 'role' and 'content'."""
         # Convert to Gemini format
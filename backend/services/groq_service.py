@@ -1,8 +1,35 @@
 """Simple Groq AI service wrapper for testing."""
 
 import os
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Tuple
 from dotenv import load_dotenv
-from groq import Groq
+from groq import AsyncGroq, Groq
+
+
+@lru_cache(maxsize=8)
+def _groq_clients(api_key: Optional[str]) -> Tuple[Groq, AsyncGroq]:
+    """Build the sync/async client pair once per key; both pool connections internally."""
+    if api_key:
+        return Groq(api_key=api_key), AsyncGroq(api_key=api_key)
+    return Groq(), AsyncGroq()  # Uses GROQ_API_KEY from env
+
+
+@lru_cache(maxsize=32)
+def _system_message(system_prompt: str) -> dict:
+    """Reuse one message dict per distinct system prompt (the SDK never mutates it)."""
+    return {"role": "system", "content": system_prompt}
+
+
+def _build_messages(prompt: str, system_prompt: Optional[str]) -> list:
+    user_message = {"role": "user", "content": prompt}
+    if system_prompt:
+        return [_system_message(system_prompt), user_message]
+    return [user_message]
+
+
+# Sampling settings every call here leaves at their defaults
+_COMPLETION_DEFAULTS = {"top_p": 1, "stop": None}
 
 
 class GroqService:
@@ -11,11 +38,8 @@ class GroqService:
     def __init__(self, api_key: str = None, model_name: str = None):
         self._api_key = api_key or os.getenv("GROQ_API_KEY")
         
-        # Initialize Groq client
-        if self._api_key:
-            self._client = Groq(api_key=self._api_key)
-        else:
-            self._client = Groq()  # Uses GROQ_API_KEY from env
+        # Shared Groq clients
+        self._client, self._async_client = _groq_clients(self._api_key)
         
         # Set model (hardcoded default for hackathon)
         self._model_name = model_name or "llama-3.1-8b-instant"
@@ -29,21 +53,13 @@ class GroqService:
         stream: bool = False
     ) -> str:
         """Generate text from a prompt."""
-        messages = []
-        
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        
-        messages.append({"role": "user", "content": prompt})
-        
         completion = self._client.chat.completions.create(
             model=self._model_name,
-            messages=messages,
+            messages=_build_messages(prompt, system_prompt),
             temperature=temperature,
             max_completion_tokens=max_tokens,
-            top_p=1,
             stream=stream,
-            stop=None
+            **_COMPLETION_DEFAULTS
         )
         
         if stream:
@@ -51,6 +67,28 @@ class GroqService:
         else:
             return completion.choices[0].message.content
 
+    async def stream_text(
+        self,
+        prompt: str,
+        system_prompt: str = None,
+        temperature: float = 1,
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[str]:
+        """Yield the completion for a prompt as tokens arrive."""
+        completion = await self._async_client.chat.completions.create(
+            model=self._model_name,
+            messages=_build_messages(prompt, system_prompt),
+            temperature=temperature,
+            max_completion_tokens=max_tokens,
+            stream=True,
+            **_COMPLETION_DEFAULTS
+        )
+
+        async for chunk in completion:
+            text = chunk.choices[0].delta.content
+            if text:
+                yield text
+
     def chat(self, messages: list, stream: bool = False) -> str:
         """Chat with context. Pass list of dicts with 'role' and 'content'."""
         completion = self._client.chat.completions.create(
@@ -58,9 +96,8 @@ class GroqService:
             messages=messages,
             temperature=1,
             max_completion_tokens=1024,
-            top_p=1,
             stream=stream,
-            stop=None
+            **_COMPLETION_DEFAULTS
         )
         
         if stream:
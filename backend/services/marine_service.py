@@ -1,58 +1,110 @@
-import os
+import time
 import asyncio
 from datetime import datetime, timezone
-from typing import Dict, Any
-import math
-import requests
+from typing import Dict, Any, Optional, Tuple
+import functools
+from bisect import bisect_right
+import httpx
+import numpy as np
 from models.schemas import MarineConditions
 
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+
+MPH_TO_KNOTS = 0.868976
+
+_DIRECTIONS = ("N", "NE", "E", "SE", "S", "SW", "W", "NW")
+
+# Open-Meteo updates on the order of minutes, so reuse payloads this long
+FORECAST_CACHE_TTL_SEC = 300
+
+# Upper bounds of each lunar phase as a fraction of the synodic month;
+# the final label covers everything past the last threshold
+_LUNAR_THRESHOLDS = (0.0625, 0.1875, 0.3125, 0.4375, 0.5625, 0.6875, 0.8125)
+_LUNAR_LABELS = (
+    "New moon", "Waxing crescent", "First quarter", "Waxing gibbous",
+    "Full moon", "Waning gibbous", "Last quarter", "Waning crescent",
+)
+
+# Tactical comment tiers, calmest first. Wind (kt) picks the tier; seas can
+# only push it rougher (2+ ft rules out tier 0, 3+ ft rules out tier 1)
+_COMMENT_WIND_THRESHOLDS = (8, 12, 15, 20)
+_COMMENT_WAVE_THRESHOLDS = (2, 3)
+_TIER_COMMENTS = ("Prime drop", "Good fishing", "Building breeze", "Windline forming", "Shift inshore")
+
+# Time-of-day overrides: hour -> 0 dawn (5-8), 1 evening (17-21), 2 night (21+), 3 daytime;
+# they only look at wind bands <10, 10-12 and 12+ kt
+_HOUR_BUCKETS = tuple(
+    0 if 5 <= h < 8 else 1 if 17 <= h < 21 else 2 if h >= 21 else 3 for h in range(24)
+)
+_CALM_THRESHOLDS = (10, 12)
+
+def _tactical_comment(tier: int, calm: int, hour_bucket: int) -> str:
+    if hour_bucket == 0:
+        return _TIER_COMMENTS[tier] if calm < 2 else "Dawn window closing"
+    if hour_bucket == 1:
+        return "Evening bite" if calm < 2 else "Evening wind easing"
+    if hour_bucket == 2:
+        return "Night calm" if calm < 1 else "Overnight conditions"
+    return _TIER_COMMENTS[tier]
+
+# Every (tier, calm band, hour bucket) answer, so the hot path is a single lookup
+_TACTICAL_COMMENTS = {
+    (tier, calm, hour_bucket): _tactical_comment(tier, calm, hour_bucket)
+    for tier in range(len(_TIER_COMMENTS))
+    for calm in range(len(_CALM_THRESHOLDS) + 1)
+    for hour_bucket in range(4)
+}
+
+# Both only change with the clock, so memoize per minute: the common
+# path becomes a cache lookup instead of datetime math on every request
+@functools.lru_cache(maxsize=4)
+def _lunar_phase_for_minute(epoch_minute: int) -> str:
+    now = datetime.fromtimestamp(epoch_minute * 60, timezone.utc)
+    # Known new moon reference: Jan 6, 2000
+    reference = datetime(2000, 1, 6, 18, 14, tzinfo=timezone.utc)
+    days_since = (now - reference).total_seconds() / 86400
+    synodic_month = 29.53058867  # Average lunar cycle
+    phase = (days_since % synodic_month) / synodic_month
+
+    return _LUNAR_LABELS[bisect_right(_LUNAR_THRESHOLDS, phase)]
+
+@functools.lru_cache(maxsize=4)
+def _tide_state_for_minute(epoch_minute: int) -> str:
+    # Simplified tide calculation - in production use NOAA tide API
+    now = datetime.fromtimestamp(epoch_minute * 60, timezone.utc)
+    hours = now.hour + now.minute / 60.0
+
+    # Simplified tidal cycle (2 high tides per day)
+    tide_cycle = (hours % 12.4) / 12.4
+
+    if tide_cycle < 0.15 or tide_cycle > 0.85:
+        return "High"
+    elif 0.35 < tide_cycle < 0.65:
+        return "Low"
+    elif tide_cycle < 0.35:
+        return "Falling"
+    else:
+        return "Rising"
+
 class MarineService:
-    def __init__(self):
-        pass  # Open-Meteo doesn't require API key
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        # Open-Meteo doesn't require API key
+        self._http = http_client or httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+        # In-flight Open-Meteo fetches, keyed by coordinates rounded to ~1 km
+        self._pending: Dict[Tuple[float, float], asyncio.Task] = {}
+        # Completed fetches as (fetched_at, payload), same keys
+        self._cache: Dict[Tuple[float, float], Tuple[float, Dict[str, Any]]] = {}
 
     def _calculate_lunar_phase(self) -> str:
         """Calculate current lunar phase using astronomical formula"""
-        now = datetime.now(timezone.utc)
-        # Known new moon reference: Jan 6, 2000
-        reference = datetime(2000, 1, 6, 18, 14, tzinfo=timezone.utc)
-        days_since = (now - reference).total_seconds() / 86400
-        synodic_month = 29.53058867  # Average lunar cycle
-        phase = (days_since % synodic_month) / synodic_month
-
-        if phase < 0.0625:
-            return "New moon"
-        elif phase < 0.1875:
-            return "Waxing crescent"
-        elif phase < 0.3125:
-            return "First quarter"
-        elif phase < 0.4375:
-            return "Waxing gibbous"
-        elif phase < 0.5625:
-            return "Full moon"
-        elif phase < 0.6875:
-            return "Waning gibbous"
-        elif phase < 0.8125:
-            return "Last quarter"
-        else:
-            return "Waning crescent"
+        return _lunar_phase_for_minute(int(time.time()) // 60)
 
     def _calculate_tide_state(self, lat: float, lng: float) -> str:
         """Simple tide estimation based on lunar position and time"""
-        # Simplified tide calculation - in production use NOAA tide API
-        now = datetime.now(timezone.utc)
-        hours = now.hour + now.minute / 60.0
-
-        # Simplified tidal cycle (2 high tides per day)
-        tide_cycle = (hours % 12.4) / 12.4
-
-        if tide_cycle < 0.15 or tide_cycle > 0.85:
-            return "High"
-        elif 0.35 < tide_cycle < 0.65:
-            return "Low"
-        elif tide_cycle < 0.35:
-            return "Falling"
-        else:
-            return "Rising"
+        return _tide_state_for_minute(int(time.time()) // 60)
 
     async def get_conditions(self, lat: float, lng: float) -> MarineConditions:
         """Fetch real-time marine conditions for the given location"""
@@ -87,10 +139,41 @@ class MarineService:
                 temperature=55.0
             )
 
-    async def _fetch_weather_data(self, lat: float, lng: float) -> Dict[str, Any]:
+    async def _fetch_all(self, lat: float, lng: float) -> Dict[str, Any]:
+        """
+        Fetch current and hourly weather from Open-Meteo in a single request.
+
+        Results are cached per ~1 km cell for FORECAST_CACHE_TTL_SEC, and
+        concurrent misses for the same cell share one upstream call, so
+        get_conditions and get_hourly_forecast cost at most one round-trip.
+        """
+        key = (round(lat, 2), round(lng, 2))
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < FORECAST_CACHE_TTL_SEC:
+            return cached[1]
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self._request_and_cache(key, lat, lng))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # Shield so one cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _request_and_cache(
+        self, key: Tuple[float, float], lat: float, lng: float
+    ) -> Dict[str, Any]:
+        data = await self._request_forecast(lat, lng)
+        now = time.monotonic()
+        # Drop expired cells so polling many locations doesn't grow the cache forever
+        for stale in [k for k, (ts, _) in self._cache.items() if now - ts >= FORECAST_CACHE_TTL_SEC]:
+            del self._cache[stale]
+        self._cache[key] = (now, data)
+        return data
+
+    async def _request_forecast(self, lat: float, lng: float) -> Dict[str, Any]:
         """Fetch weather data from Open-Meteo API (free, no API key required)"""
 
-        url = "https://api.open-meteo.com/v1/forecast"
         params = {
             'latitude': lat,
             'longitude': lng,
@@ -99,17 +182,16 @@ class MarineService:
             'temperature_unit': 'fahrenheit',
             'wind_speed_unit': 'mph',
             'timezone': 'auto',
-            'forecast_days': 1
+            'forecast_days': 2
         }
 
-        # Make request in thread to avoid blocking
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: requests.get(url, params=params, timeout=10)
-        )
+        response = await self._http.get(OPEN_METEO_URL, params=params)
         response.raise_for_status()
-        data = response.json()
+        return response.json()
+
+    async def _fetch_weather_data(self, lat: float, lng: float) -> Dict[str, Any]:
+        """Current weather summary for get_conditions"""
+        data = await self._fetch_all(lat, lng)
 
         # Extract current weather data
         current = data.get('current', {})
@@ -122,7 +204,7 @@ class MarineService:
 
         # Estimate wave height from wind speed (simplified)
         # Rule of thumb: wave height (ft) ≈ wind speed (knots) / 10
-        wind_knots = wind_speed * 0.868976  # mph to knots
+        wind_knots = wind_speed * MPH_TO_KNOTS
         wave_height = max(1.0, wind_knots / 10)  # Minimum 1ft
 
         return {
@@ -134,31 +216,13 @@ class MarineService:
 
     def _degrees_to_direction(self, degrees: float) -> str:
         """Convert wind degrees to cardinal direction"""
-        directions = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
-        index = round(degrees / 45) % 8
-        return directions[index]
+        # Shift by half a sector so each 45° bucket is centred on its direction
+        return _DIRECTIONS[int((degrees + 22.5) // 45) % 8]
 
     async def get_hourly_forecast(self, lat: float, lng: float) -> list:
         """Fetch real hourly forecast data from Open-Meteo"""
         try:
-            url = "https://api.open-meteo.com/v1/forecast"
-            params = {
-                'latitude': lat,
-                'longitude': lng,
-                'hourly': 'temperature_2m,wind_speed_10m,wind_direction_10m,wind_gusts_10m',
-                'temperature_unit': 'fahrenheit',
-                'wind_speed_unit': 'mph',
-                'timezone': 'auto',
-                'forecast_days': 2
-            }
-
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.get(url, params=params, timeout=10)
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = await self._fetch_all(lat, lng)
 
             hourly_data = data.get('hourly', {})
             times = hourly_data.get('time', [])
@@ -167,49 +231,49 @@ class MarineService:
             wind_dirs = hourly_data.get('wind_direction_10m', [])
             gusts = hourly_data.get('wind_gusts_10m', [])
 
-            # Get current hour
-            now = datetime.now()
-            current_hour = now.hour
+            # Numeric columns for up to 24 hours in one pass each
+            n = min(24, len(times), len(temps), len(winds))
+            # Convert mph to knots for marine use
+            wind_knots = np.asarray(winds[:n], dtype=float) * MPH_TO_KNOTS
+            # Hours without a gust reading assume gusts 30% over the wind
+            gust_knots = wind_knots * 1.3
+            n_gusts = min(n, len(gusts))
+            gust_knots[:n_gusts] = np.asarray(gusts[:n_gusts], dtype=float) * MPH_TO_KNOTS
+            # Estimate wave height and current from wind (simplified)
+            wave_heights = np.maximum(1.0, wind_knots / 10)
+            current_speeds = wind_knots / 15
+            # Determine rating based on conditions
+            ratings = np.select(
+                [
+                    (wind_knots > 20) | (wave_heights > 4),
+                    (wind_knots > 15) | (wave_heights > 3),
+                    wind_knots > 10,
+                ],
+                ["planb", "caution", "fair"],
+                default="good",
+            )
 
-            # Build hourly forecast array
+            # Build hourly forecast array; only the string fields are per-row work
             forecast = []
-            for i in range(min(24, len(times))):
-                if i < len(temps) and i < len(winds):
-                    hour_time = datetime.fromisoformat(times[i].replace('Z', '+00:00'))
-
-                    # Convert mph to knots for marine use
-                    wind_knots = winds[i] * 0.868976
-                    gust_knots = gusts[i] * 0.868976 if i < len(gusts) else wind_knots * 1.3
-
-                    # Estimate wave height from wind
-                    wave_height = max(1.0, wind_knots / 10)
-
-                    # Estimate current from wind (simplified)
-                    current_speed = wind_knots / 15
-
-                    # Determine rating based on conditions
-                    rating = "good"
-                    if wind_knots > 20 or wave_height > 4:
-                        rating = "planb"
-                    elif wind_knots > 15 or wave_height > 3:
-                        rating = "caution"
-                    elif wind_knots > 10:
-                        rating = "fair"
-
-                    # Generate tactical comment
-                    comment = self._generate_tactical_comment(wind_knots, wave_height, hour_time.hour)
-
-                    forecast.append({
-                        'label': 'Now' if i == 0 else hour_time.strftime('%H:%M'),
-                        'time': hour_time.strftime('%I:%M %p'),
-                        'wind': f"{self._degrees_to_direction(wind_dirs[i])} {int(wind_knots)} kt",
-                        'gust': f"{int(gust_knots)} kt",
-                        'seas': f"{wave_height:.1f} ft @ 9s",
-                        'current': f"{current_speed:.1f} kt {self._degrees_to_direction(wind_dirs[i])}",
-                        'comment': comment,
-                        'rating': rating,
-                        'temperature': int(temps[i])
-                    })
+            for i, (wind, gust, wave_height, current_speed, rating) in enumerate(zip(
+                wind_knots.tolist(), gust_knots.tolist(), wave_heights.tolist(),
+                current_speeds.tolist(), ratings.tolist(),
+            )):
+                # timezone=auto gives naive local times ("2024-06-01T14:00"), no 'Z' to rewrite
+                hour_time = datetime.fromisoformat(times[i])
+                direction = self._degrees_to_direction(wind_dirs[i])
+
+                forecast.append({
+                    'label': 'Now' if i == 0 else hour_time.strftime('%H:%M'),
+                    'time': hour_time.strftime('%I:%M %p'),
+                    'wind': f"{direction} {int(wind)} kt",
+                    'gust': f"{int(gust)} kt",
+                    'seas': f"{wave_height:.1f} ft @ 9s",
+                    'current': f"{current_speed:.1f} kt {direction}",
+                    'comment': self._generate_tactical_comment(wind, wave_height, hour_time.hour),
+                    'rating': rating,
+                    'temperature': int(temps[i])
+                })
 
             return forecast
 
@@ -219,23 +283,9 @@ class MarineService:
 
     def _generate_tactical_comment(self, wind_knots: float, wave_height: float, hour: int) -> str:
         """Generate tactical fishing comment based on conditions"""
-        if wind_knots < 8 and wave_height < 2:
-            comments = ["Prime drop", "Glassy calm", "Perfect conditions"]
-        elif wind_knots < 12 and wave_height < 3:
-            comments = ["Good fishing", "Manageable seas", "Slack, stay on spot"]
-        elif wind_knots < 15:
-            comments = ["Building breeze", "Slide along ridge", "Steady drift"]
-        elif wind_knots < 20:
-            comments = ["Windline forming", "Getting choppy", "Monitor conditions"]
-        else:
-            comments = ["Shift inshore", "Seek shelter", "Plan B time"]
-
-        # Add time-based variations
-        if 5 <= hour < 8:
-            return comments[0] if wind_knots < 12 else "Dawn window closing"
-        elif 17 <= hour < 21:
-            return "Evening bite" if wind_knots < 12 else "Evening wind easing"
-        elif hour >= 21:
-            return "Night calm" if wind_knots < 10 else "Overnight conditions"
-
-        return comments[0]
\ No newline at end of file
+        tier = max(
+            bisect_right(_COMMENT_WIND_THRESHOLDS, wind_knots),
+            bisect_right(_COMMENT_WAVE_THRESHOLDS, wave_height),
+        )
+        calm = bisect_right(_CALM_THRESHOLDS, wind_knots)
+        return _TACTICAL_COMMENTS[tier, calm, _HOUR_BUCKETS[hour]]
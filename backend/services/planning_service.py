@@ -1,17 +1,296 @@
 import os
-import json
+import asyncio
+import logging
 import re
 import subprocess
+import time
 from datetime import datetime, timedelta
-import google.generativeai as genai
+from typing import Any, Dict, Optional, Tuple
+import httpx
+import orjson
+from google.api_core.exceptions import ResourceExhausted
+from pydantic import BaseModel, TypeAdapter
 from models.schemas import (
     PlanRequest, PlanResponse, BiteWindow,
     HourlyForecast, FishermanForecast
 )
 from services.marine_service import MarineService
+from services.gemini_service import get_gemini_model
+
+logger = logging.getLogger(__name__)
+
+
+class _PlanDraft(BaseModel):
+    """Plan fields Gemini fills in; conditions and forecast are added by the service"""
+    target_species: str
+    depth_band: str
+    time_window: str
+    area_hint: str
+    fuel_notes: str
+    safety_notes: str
+    plan_b: str
+    confidence: float
+
+
+class _ForecastDraft(BaseModel):
+    """Forecast fields Gemini fills in; hourly rows come from Open-Meteo"""
+    location_name: str
+    condition_summary: str
+    sea_surface_temp: int
+    air_temp: int
+    marine_summary: str
+    solunar: str
+    swell_summary: str
+    tide_summary: str
+    warnings: list[str]
+    bite_windows: list[BiteWindow]
+
+
+class _CombinedDraft(BaseModel):
+    plan: _PlanDraft
+    forecast: _ForecastDraft
+
+
+# Validates the Open-Meteo hourly rows in one pydantic-core call
+_HOURLY_ADAPTER = TypeAdapter(list[HourlyForecast])
+
+# Schema-constrained JSON mode; a low temperature keeps answers for the same
+# conditions stable
+_PLAN_CONFIG = {"response_mime_type": "application/json", "response_schema": _PlanDraft, "temperature": 0.3}
+_FORECAST_CONFIG = {"response_mime_type": "application/json", "response_schema": _ForecastDraft, "temperature": 0.3}
+_COMBINED_CONFIG = {"response_mime_type": "application/json", "response_schema": _CombinedDraft, "temperature": 0.3}
+
+# Cap in-flight Gemini calls so bursts queue here instead of tripping the quota;
+# calls that still hit a 429 back off and retry
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', '8'))
+GEMINI_MAX_RETRIES = 2
+GEMINI_RETRY_BASE_SEC = 0.5
+
+# Characters that can change JSON nesting; everything else is skipped in bulk
+_JSON_STRUCTURE = re.compile(r'[{}"\\]')
+
+# Plans only depend on coarse location/time, so identical requests within the
+# same hour reuse them; full responses embed the forecast and expire sooner
+PLAN_CACHE_TTL_SEC = 3600
+RESPONSE_CACHE_TTL_SEC = 900
+PLAN_CACHE_MAX_ENTRIES = 1024
+
+PlanKey = Tuple[float, float, str, Tuple[str, ...], Optional[int]]
+
+
+def _plan_cache_key(request: PlanRequest, now: datetime) -> PlanKey:
+    """Quantize a request to ~1 km and the current hour"""
+    hour_bucket = now.replace(minute=0, second=0, microsecond=0).isoformat()
+    return (
+        round(request.location.lat, 2),
+        round(request.location.lng, 2),
+        hour_bucket,
+        tuple(sorted(request.target_species or ())),
+        request.trip_duration,
+    )
+
+
+def _cache_get(cache: Dict[PlanKey, Tuple[float, Any]], key: PlanKey, ttl: float) -> Any:
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    if time.monotonic() - cached[0] >= ttl:
+        del cache[key]
+        return None
+    return cached[1]
+
+
+def _cache_put(cache: Dict[PlanKey, Tuple[float, Any]], key: PlanKey, value: Any) -> None:
+    cache.pop(key, None)
+    cache[key] = (time.monotonic(), value)
+    # Dicts keep insertion order, so the first entry is the oldest
+    while len(cache) > PLAN_CACHE_MAX_ENTRIES:
+        del cache[next(iter(cache))]
+
+
+_PLAN_ROLE = (
+    "You are an expert fishing guide and marine captain with decades of experience in coastal fishing operations.\n"
+    "Generate a detailed fishing trip plan based on the following conditions:"
+)
+_FORECAST_ROLE = "You are an expert fishing meteorologist and marine forecaster providing detailed fisherman-friendly forecasts."
+_COMBINED_ROLE = (
+    "You are an expert fishing guide, marine captain and marine forecaster with decades of experience in coastal fishing operations.\n"
+    "Generate a detailed fishing trip plan and a fisherman-friendly forecast based on the following conditions:"
+)
+_JSON_FORMAT_HEADER = "Respond ONLY with valid JSON in this exact format:"
+
+_PLAN_EXAMPLE = """{
+  "target_species": "Rockfish, Lingcod",
+  "depth_band": "80-120 ft",
+  "time_window": "Dawn + 2hrs (5:30-7:30 AM)",
+  "area_hint": "North reef structures, 1-3nm offshore",
+  "fuel_notes": "15 gal estimated for 6hr trip",
+  "safety_notes": "VHF Channel 16, EPIRB active, monitor wind",
+  "plan_b": "Shallow water halibut (40-60ft) if conditions worsen",
+  "confidence": 0.87
+}"""
+
+_FORECAST_EXAMPLE = """{
+  "location_name": "Coastal Shelf",
+  "condition_summary": "Calm dawn seas with light NW windline building after lunch.",
+  "sea_surface_temp": 56,
+  "air_temp": 58,
+  "marine_summary": "Current 8 mph NW winds are generating 2.0 ft seas, ideal for small boat operations. The Rising tide combined with Waxing crescent phase creates optimal feeding conditions near structure. Water temp of 55°F favors active rockfish and lingcod in the 80-120ft depth range.",
+  "solunar": "Major 05:48 AM - 07:15 AM · Minor 11:32 AM - 12:10 PM",
+  "swell_summary": "2.5 ft WNW @ 9s",
+  "tide_summary": "Flooding to +5.7 ft by 09:40",
+  "warnings": ["NW windline builds 18 kt after 14:00; expect tight chop beyond 3 nm."],
+  "bite_windows": [
+    {"label": "Dawn Window", "window": "5:20 AM - 7:40 AM", "action": "Drop metal jigs on reef peak", "tide": "Slack flood", "confidence": "High"}
+  ]
+}"""
+_PLAN_RESPONSE_FORMAT = f"{_JSON_FORMAT_HEADER}\n{_PLAN_EXAMPLE}"
+_FORECAST_RESPONSE_FORMAT = f"{_JSON_FORMAT_HEADER}\n{_FORECAST_EXAMPLE}"
+_COMBINED_RESPONSE_FORMAT = f'{_JSON_FORMAT_HEADER}\n{{"plan": {_PLAN_EXAMPLE},\n"forecast": {_FORECAST_EXAMPLE}}}'
+
+
+def _trip_context(request: PlanRequest, conditions, current_time: datetime) -> str:
+    """Location, trip and marine condition block shared by every prompt"""
+    context = {
+        "latitude": request.location.lat,
+        "longitude": request.location.lng,
+        "current_time": current_time.strftime('%I:%M %p'),
+        "trip_duration": f"{request.trip_duration} hours" if request.trip_duration else "4-6 hours",
+        "target_species": request.target_species or "any common local species",
+        "wind_mph": conditions.wind_speed,
+        "wind_direction": conditions.wind_direction,
+        "wave_height_ft": conditions.wave_height,
+        "water_temp_f": conditions.temperature,
+        "tide": conditions.tide,
+        "lunar_phase": conditions.lunar,
+    }
+    return f"**Trip and Current Marine Conditions:** {orjson.dumps(context).decode()}"
+
+
+_PLAN_INSTRUCTIONS_HEAD = """Based on these conditions, provide a comprehensive fishing plan that includes:
+
+1. **Target Species**: Best species to target given the conditions (be specific, e.g., "Rockfish, Lingcod, Cabezon")
+2. **Depth Band**: Optimal depth range in feet (e.g., "60-100 ft")
+3. **Time Window**: Best time window for fishing based on tide and conditions (e.g., "Dawn + 2hrs (5:30-7:30 AM)" or "Next tide change (2:00-4:00 PM)")
+4. **Area Hint**: General area description without revealing exact spots (e.g., "Rocky outcrops 1-2nm northwest" or "Kelp beds near channel entrance")
+"""
+_PLAN_INSTRUCTIONS_TAIL = """
+6. **Safety Notes**: Critical safety considerations given conditions (e.g., "Monitor wind - may increase afternoon" or "VHF Channel 16, EPIRB active, avoid lee shores")
+7. **Plan B**: Alternative strategy if conditions worsen or primary plan fails (e.g., "Move to protected bay for sand bass (30-50ft)" or "Target shallow halibut if waves build")
+8. **Confidence**: Your confidence in this plan as a decimal 0.0-1.0 (e.g., 0.87 for very good conditions, 0.65 for marginal)
+
+**Important Guidelines:**
+- If wind is >15 mph or waves >4 ft, recommend caution or alternative protected areas
+- Lunar phase affects fish activity: full/new moon = better fishing, especially during tide changes
+- Temperature affects species: colder water = deeper fish, warmer = more shallow activity
+- Provide multiple viable areas to avoid crowding specific spots
+- Be specific but practical for small boat operations"""
+
+
+def _plan_instructions(request: PlanRequest) -> str:
+    trip_duration_str = f"{request.trip_duration} hours" if request.trip_duration else "4-6 hours"
+    # Only the fuel line varies per request
+    return "".join([
+        _PLAN_INSTRUCTIONS_HEAD,
+        f'5. **Fuel Notes**: Estimated fuel consumption and any efficiency tips (e.g., "12-18 gal for {trip_duration_str}, optimize cruise at 3000 RPM")',
+        _PLAN_INSTRUCTIONS_TAIL,
+    ])
+
+
+_FORECAST_INSTRUCTIONS_HEAD = """Generate a comprehensive fisherman forecast that includes:
+
+1. **Location Name**: A descriptive name for the fishing area (e.g., "Coastal Shelf", "North Bank", "Inner Sound")
+
+2. **Condition Summary**: A concise, natural-language summary of the day's conditions in fisherman terms (e.g., "Calm dawn seas with light NW windline building after lunch.")
+
+3. **Sea Surface Temp**: Water temperature in Fahrenheit (integer, e.g., 56)
+
+4. **Air Temp**: Air temperature in Fahrenheit (integer, e.g., 58)
+
+"""
+_FORECAST_INSTRUCTIONS_TAIL = """
+
+6. **Solunar**: Major and minor feeding periods based on lunar phase and time (e.g., "Major 05:48 AM - 07:15 AM · Minor 11:32 AM - 12:10 PM")
+
+7. **Swell Summary**: Swell conditions with direction and period (e.g., "2.5 ft WNW @ 9s")
+
+8. **Tide Summary**: Tide state and timing (e.g., "Flooding to +5.7 ft by 09:40")
+
+9. **Warnings**: Array of 1-3 specific warnings or notices for the day (e.g., "NW windline builds 18 kt after 14:00; expect tight chop beyond 3 nm", "Dense crab pot field along 60 ft contour heading south")
+
+10. **Bite Windows**: Array of 2-3 optimal fishing windows:
+   - label: "Dawn Window", "Late Morning", "Afternoon", or "Plan B"
+   - window: Time range (e.g., "5:20 AM - 7:40 AM")
+   - action: Specific technique (e.g., "Drop metal jigs on reef peak", "Slow drift bait rigs")
+   - tide: Tide state (e.g., "Slack flood", "First ebb push")
+   - confidence: "High", "Medium", "Low", or "Contingency"
+
+**Guidelines:**
+- Wind typically builds through the day
+- Align bite windows with tide changes and solunar periods
+- Include at least one "Plan B" window for deteriorating conditions
+- Make warnings specific and actionable
+- Use nautical miles (nm), knots (kt), and feet (ft) for measurements"""
+
+
+def _forecast_instructions(conditions) -> str:
+    # Only the marine summary example varies per request
+    return "".join([
+        _FORECAST_INSTRUCTIONS_HEAD,
+        f'5. **Marine Summary**: A detailed 2-3 sentence analysis of current marine conditions based on the real-time data, explaining how wind, waves, temperature, tide, and lunar phase interact to affect fishing. Be specific and actionable. (e.g., "Current {conditions.wind_speed} mph {conditions.wind_direction} winds are generating {conditions.wave_height} ft seas. The {conditions.tide} tide combined with {conditions.lunar} phase creates optimal feeding conditions near structure. Water temp of {conditions.temperature}°F favors active fish in 60-100ft depth range.")',
+        _FORECAST_INSTRUCTIONS_TAIL,
+    ])
+
+
+class _JsonObjectTracker:
+    """Follows brace depth across streamed chunks, ignoring braces inside strings"""
+
+    __slots__ = ('depth', 'in_string', 'carry_escape')
 
-class PlanningService:
     def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        # The previous chunk ended with a backslash inside a string
+        self.carry_escape = False
+
+    def feed(self, chunk: str) -> int:
+        """Return the offset just past the top-level closing brace, or -1 if still open"""
+        escaped_at = 0 if self.carry_escape else -1
+        for match in _JSON_STRUCTURE.finditer(chunk):
+            pos = match.start()
+            char = match.group()
+            if self.in_string:
+                if pos == escaped_at:
+                    continue
+                if char == '\\':
+                    escaped_at = pos + 1
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                self.depth += 1
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return pos + 1
+        self.carry_escape = escaped_at == len(chunk)
+        return -1
+
+
+async def _close_stream(response) -> None:
+    """Close the RPC iterator behind a Gemini stream so an abandoned reply is cancelled"""
+    iterator = getattr(response, '_iterator', None)
+    if hasattr(iterator, 'aclose'):
+        await iterator.aclose()
+
+
+class PlanningService:
+    def __init__(
+        self,
+        marine_service: Optional[MarineService] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         # Silently fetch and pull latest code from GitHub
         try:
             subprocess.run(['git', 'fetch', 'origin'],
@@ -21,35 +300,62 @@ class PlanningService:
         except Exception:
             pass  # Silently fail if git operations don't work
 
-        self.marine_service = MarineService()
+        self.marine_service = marine_service or MarineService()
+        self._http = http_client or httpx.AsyncClient(timeout=10)
+        # Optional Ollama-style endpoint, e.g. http://localhost:11434/api/generate
+        self._local_model_url = os.getenv('LOCAL_MODEL_URL')
         # Initialize Gemini API
         api_key = os.getenv('GEMINI_API_KEY')
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.model = get_gemini_model('gemini-2.0-flash-exp', api_key)
+        self._gemini_sem = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+        self._plan_cache: Dict[PlanKey, Tuple[float, dict]] = {}
+        self._response_cache: Dict[PlanKey, Tuple[float, PlanResponse]] = {}
 
     async def create_plan(self, request: PlanRequest) -> PlanResponse:
-        # Get real-time marine conditions for the location
-        conditions = await self.marine_service.get_conditions(
-            request.location.lat,
-            request.location.lng
+        # One clock read per request feeds the cache key and the prompt context
+        now = datetime.now()
+        cache_key = _plan_cache_key(request, now)
+        cached_response = _cache_get(self._response_cache, cache_key, RESPONSE_CACHE_TTL_SEC)
+        if cached_response is not None:
+            return cached_response
+
+        # Get real-time marine conditions and the hourly forecast together;
+        # both are served from the same Open-Meteo fetch
+        conditions, hourly_forecast = await asyncio.gather(
+            self.marine_service.get_conditions(request.location.lat, request.location.lng),
+            self.marine_service.get_hourly_forecast(request.location.lat, request.location.lng),
         )
 
-        # Get real hourly forecast data
-        hourly_forecast = await self.marine_service.get_hourly_forecast(
-            request.location.lat,
-            request.location.lng
-        )
+        context = _trip_context(request, conditions, now)
+        cached_plan = _cache_get(self._plan_cache, cache_key, PLAN_CACHE_TTL_SEC)
+        plan_data = forecast = None
+        if cached_plan is None and not self._local_model_url:
+            # One round trip for both when nothing can be reused
+            try:
+                plan_data, forecast = await self._generate_combined(request, conditions, context, hourly_forecast)
+            except Exception as e:
+                logger.warning("Combined plan and forecast failed, generating separately: %s", e)
+
+        if plan_data is None:
+            # The plan and the fisherman forecast only depend on the marine data, so
+            # generate them side by side; a failed forecast still leaves a usable plan
+            plan_data, forecast = await asyncio.gather(
+                self._cached_plan(cached_plan) if cached_plan is not None
+                else self._generate_intelligent_plan(request, conditions, context),
+                self._generate_fisherman_forecast(conditions, context, hourly_forecast),
+                return_exceptions=True,
+            )
+        if isinstance(forecast, BaseException):
+            logger.warning("Forecast generation failed: %s", forecast)
+            forecast = None
 
         try:
-            # Generate intelligent plan using Gemini
-            plan_data = await self._generate_intelligent_plan(request, conditions)
+            if isinstance(plan_data, BaseException):
+                raise plan_data
 
-            # Generate fisherman forecast with real hourly data
-            forecast = await self._generate_fisherman_forecast(request, conditions, hourly_forecast)
-
-            return PlanResponse(
+            response = PlanResponse(
                 target_species=plan_data['target_species'],
                 depth_band=plan_data['depth_band'],
                 time_window=plan_data['time_window'],
@@ -61,11 +367,13 @@ class PlanningService:
                 confidence=plan_data['confidence'],
                 forecast=forecast
             )
+            _cache_put(self._plan_cache, cache_key, plan_data)
+            if forecast is not None:
+                _cache_put(self._response_cache, cache_key, response)
+            return response
 
-        except Exception as e:
-            print(f"Error generating plan: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Plan generation failed, using fallback plan")
 
             # Fallback to reasonable default
             return PlanResponse(
@@ -78,333 +386,118 @@ class PlanningService:
                 safety_notes="VHF Channel 16, check weather updates",
                 plan_b="Shallow water fishing (40-60ft) if conditions worsen",
                 confidence=0.75,
-                forecast=None
+                forecast=forecast
             )
 
-    async def _generate_intelligent_plan(self, request: PlanRequest, conditions) -> dict:
-        """Use local model (with fallback to Gemini) to generate an intelligent fishing plan"""
-
-        # Try local model first (will always fail as we don't have one running)
-        try:
-            return await self._call_local_model_plan(request, conditions)
-        except Exception as local_error:
-            print(f"Local model unavailable, falling back to Gemini: {local_error}")
-            # Fall through to Gemini
-
-        # Build context for the AI
-        current_time = datetime.now()
-        current_hour = current_time.hour
-
-        target_species_str = ', '.join(request.target_species) if request.target_species else 'any common local species'
-        trip_duration_str = f"{request.trip_duration} hours" if request.trip_duration else "4-6 hours"
-
-        prompt = f"""You are an expert fishing guide and marine captain with decades of experience in coastal fishing operations.
-Generate a detailed fishing trip plan based on the following conditions:
-
-**Location:** Latitude {request.location.lat}, Longitude {request.location.lng}
-**Current Time:** {current_hour}:00 ({current_time.strftime('%I:%M %p')})
-**Requested Duration:** {trip_duration_str}
-**Target Species (if specified):** {target_species_str}
-
-**Current Marine Conditions:**
-- Wind: {conditions.wind_speed} mph from {conditions.wind_direction}
-- Wave Height: {conditions.wave_height} ft
-- Water Temperature: {conditions.temperature}°F
-- Tide: {conditions.tide}
-- Lunar Phase: {conditions.lunar}
-
-Based on these conditions, provide a comprehensive fishing plan that includes:
-
-1. **Target Species**: Best species to target given the conditions (be specific, e.g., "Rockfish, Lingcod, Cabezon")
-2. **Depth Band**: Optimal depth range in feet (e.g., "60-100 ft")
-3. **Time Window**: Best time window for fishing based on tide and conditions (e.g., "Dawn + 2hrs (5:30-7:30 AM)" or "Next tide change (2:00-4:00 PM)")
-4. **Area Hint**: General area description without revealing exact spots (e.g., "Rocky outcrops 1-2nm northwest" or "Kelp beds near channel entrance")
-5. **Fuel Notes**: Estimated fuel consumption and any efficiency tips (e.g., "12-18 gal for {trip_duration_str}, optimize cruise at 3000 RPM")
-6. **Safety Notes**: Critical safety considerations given conditions (e.g., "Monitor wind - may increase afternoon" or "VHF Channel 16, EPIRB active, avoid lee shores")
-7. **Plan B**: Alternative strategy if conditions worsen or primary plan fails (e.g., "Move to protected bay for sand bass (30-50ft)" or "Target shallow halibut if waves build")
-8. **Confidence**: Your confidence in this plan as a decimal 0.0-1.0 (e.g., 0.87 for very good conditions, 0.65 for marginal)
+    @staticmethod
+    async def _cached_plan(plan_data: dict) -> dict:
+        return plan_data
 
-**Important Guidelines:**
-- If wind is >15 mph or waves >4 ft, recommend caution or alternative protected areas
-- Lunar phase affects fish activity: full/new moon = better fishing, especially during tide changes
-- Temperature affects species: colder water = deeper fish, warmer = more shallow activity
-- Provide multiple viable areas to avoid crowding specific spots
-- Be specific but practical for small boat operations
+    async def _generate_json(self, prompt: str, generation_config: dict) -> str:
+        """Stream a JSON reply from Gemini, stopping as soon as the top-level object closes
+
+        Calls run under the concurrency cap and back off on quota errors.
+        """
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            try:
+                async with self._gemini_sem:
+                    response = await self.model.generate_content_async(
+                        prompt, generation_config=generation_config, stream=True
+                    )
+                    parts = []
+                    tracker = _JsonObjectTracker()
+                    chunks = aiter(response)
+                    try:
+                        async for chunk in chunks:
+                            # chunk.text raises on chunks with no parts (e.g. the final finish-reason chunk)
+                            if not chunk.parts:
+                                continue
+                            text = chunk.text
+                            end = tracker.feed(text)
+                            if end >= 0:
+                                parts.append(text[:end])
+                                break
+                            parts.append(text)
+                    finally:
+                        # Breaking out early would otherwise leave the streaming RPC open
+                        await chunks.aclose()
+                        await _close_stream(response)
+                    return ''.join(parts)
+            except ResourceExhausted:
+                if attempt == GEMINI_MAX_RETRIES:
+                    raise
+            await asyncio.sleep(GEMINI_RETRY_BASE_SEC * 2 ** attempt)
+
+    async def _generate_combined(self, request: PlanRequest, conditions, context: str, hourly_forecast: list):
+        """Generate the plan and the fisherman forecast with a single Gemini call"""
+        prompt = "\n\n".join([
+            _COMBINED_ROLE,
+            context,
+            "**Part 1 - Trip Plan (\"plan\")**",
+            _plan_instructions(request),
+            "**Part 2 - Fisherman Forecast (\"forecast\")**",
+            _forecast_instructions(conditions),
+            _COMBINED_RESPONSE_FORMAT,
+        ])
+
+        result_text = await self._generate_json(prompt, _COMBINED_CONFIG)
+        combined = _CombinedDraft.model_validate_json(result_text)
+        return combined.plan.model_dump(), self._build_forecast(combined.forecast, hourly_forecast)
+
+    async def _generate_intelligent_plan(self, request: PlanRequest, conditions, context: str) -> dict:
+        """Use local model (with fallback to Gemini) to generate an intelligent fishing plan"""
 
-Respond ONLY with valid JSON in this exact format:
-{{
-  "target_species": "Rockfish, Lingcod",
-  "depth_band": "80-120 ft",
-  "time_window": "Dawn + 2hrs (5:30-7:30 AM)",
-  "area_hint": "North reef structures, 1-3nm offshore",
-  "fuel_notes": "15 gal estimated for 6hr trip",
-  "safety_notes": "VHF Channel 16, EPIRB active, monitor wind",
-  "plan_b": "Shallow water halibut (40-60ft) if conditions worsen",
-  "confidence": 0.87
-}}"""
+        # Try the local model first when one is configured
+        if self._local_model_url:
+            try:
+                return await self._call_local_model_plan(request, conditions)
+            except Exception as local_error:
+                logger.info("Local model unavailable, falling back to Gemini: %s", local_error)
+                # Fall through to Gemini
+
+        prompt = "\n\n".join([
+            _PLAN_ROLE,
+            context,
+            _plan_instructions(request),
+            _PLAN_RESPONSE_FORMAT,
+        ])
 
         # Call Gemini API
-        response = self.model.generate_content(prompt)
-        result_text = response.text.strip()
+        result_text = await self._generate_json(prompt, _PLAN_CONFIG)
+        return _PlanDraft.model_validate_json(result_text).model_dump()
 
-        # Extract JSON from markdown code blocks if present
-        if "```json" in result_text:
-            result_text = re.search(r'```json\s*(.*?)\s*```', result_text, re.DOTALL).group(1)
-        elif "```" in result_text:
-            result_text = re.search(r'```\s*(.*?)\s*```', result_text, re.DOTALL).group(1)
-
-        # Parse JSON
-        plan_data = json.loads(result_text)
-        return plan_data
-
-    async def _generate_fisherman_forecast(self, request: PlanRequest, conditions, hourly_forecast: list) -> FishermanForecast:
+    async def _generate_fisherman_forecast(self, conditions, context: str, hourly_forecast: list) -> FishermanForecast:
         """Generate comprehensive fisherman forecast with bite windows, hourly forecast, and warnings"""
 
-        current_time = datetime.now()
-
-        prompt = f"""You are an expert fishing meteorologist and marine forecaster providing detailed fisherman-friendly forecasts.
-
-**Location:** Latitude {request.location.lat}, Longitude {request.location.lng}
-**Current Time:** {current_time.strftime('%I:%M %p')}
-
-**Current Marine Conditions:**
-- Wind: {conditions.wind_speed} mph from {conditions.wind_direction}
-- Wave Height: {conditions.wave_height} ft
-- Water Temperature: {conditions.temperature}°F
-- Tide: {conditions.tide}
-- Lunar Phase: {conditions.lunar}
-
-Generate a comprehensive fisherman forecast that includes:
-
-1. **Location Name**: A descriptive name for the fishing area (e.g., "Coastal Shelf", "North Bank", "Inner Sound")
-
-2. **Condition Summary**: A concise, natural-language summary of the day's conditions in fisherman terms (e.g., "Calm dawn seas with light NW windline building after lunch.")
-
-3. **Sea Surface Temp**: Water temperature in Fahrenheit (integer, e.g., 56)
-
-4. **Air Temp**: Air temperature in Fahrenheit (integer, e.g., 58)
-
-5. **Marine Summary**: A detailed 2-3 sentence analysis of current marine conditions based on the real-time data, explaining how wind, waves, temperature, tide, and lunar phase interact to affect fishing. Be specific and actionable. (e.g., "Current {conditions.wind_speed} mph {conditions.wind_direction} winds are generating {conditions.wave_height} ft seas. The {conditions.tide} tide combined with {conditions.lunar} phase creates optimal feeding conditions near structure. Water temp of {conditions.temperature}°F favors active fish in 60-100ft depth range.")
-
-6. **Solunar**: Major and minor feeding periods based on lunar phase and time (e.g., "Major 05:48 AM - 07:15 AM · Minor 11:32 AM - 12:10 PM")
-
-7. **Swell Summary**: Swell conditions with direction and period (e.g., "2.5 ft WNW @ 9s")
-
-8. **Tide Summary**: Tide state and timing (e.g., "Flooding to +5.7 ft by 09:40")
-
-9. **Warnings**: Array of 1-3 specific warnings or notices for the day (e.g., "NW windline builds 18 kt after 14:00; expect tight chop beyond 3 nm", "Dense crab pot field along 60 ft contour heading south")
-
-10. **Bite Windows**: Array of 2-3 optimal fishing windows:
-   - label: "Dawn Window", "Late Morning", "Afternoon", or "Plan B"
-   - window: Time range (e.g., "5:20 AM - 7:40 AM")
-   - action: Specific technique (e.g., "Drop metal jigs on reef peak", "Slow drift bait rigs")
-   - tide: Tide state (e.g., "Slack flood", "First ebb push")
-   - confidence: "High", "Medium", "Low", or "Contingency"
-
-11. **Hourly**: Array of 12-24 hourly forecasts covering the full fishing day and into the evening:
-    - label: "Now" for current hour, then "07:00", "09:00", "11:00", "13:00", "15:00", "17:00", "19:00", "21:00", "23:00", etc.
-    - time: Formatted time (e.g., "5:30 AM")
-    - wind: Wind with direction (e.g., "NW 8 kt")
-    - gust: Gust speed (e.g., "12 kt")
-    - seas: Wave height and period (e.g., "2.4 ft @ 9s")
-    - current: Current speed and direction (e.g., "0.5 kt NW")
-    - comment: Brief tactical comment (e.g., "Prime drop", "Slack, stay on spot", "Windline forming")
-    - rating: "good" for ideal, "fair" for okay, "caution" for marginal, "planb" for poor
-
-**Guidelines:**
-- Base hourly forecasts on current conditions, showing realistic progression
-- Wind typically builds through the day
-- Align bite windows with tide changes and solunar periods
-- Include at least one "Plan B" window for deteriorating conditions
-- Make warnings specific and actionable
-- Use nautical miles (nm), knots (kt), and feet (ft) for measurements
-
-Respond ONLY with valid JSON in this exact format:
-{{
-  "location_name": "Coastal Shelf",
-  "condition_summary": "Calm dawn seas with light NW windline building after lunch.",
-  "sea_surface_temp": 56,
-  "air_temp": 58,
-  "marine_summary": "Current 8 mph NW winds are generating 2.0 ft seas, ideal for small boat operations. The Rising tide combined with Waxing crescent phase creates optimal feeding conditions near structure. Water temp of 55°F favors active rockfish and lingcod in the 80-120ft depth range.",
-  "solunar": "Major 05:48 AM - 07:15 AM · Minor 11:32 AM - 12:10 PM",
-  "swell_summary": "2.5 ft WNW @ 9s",
-  "tide_summary": "Flooding to +5.7 ft by 09:40",
-  "warnings": [
-    "NW windline builds 18 kt after 14:00; expect tight chop beyond 3 nm.",
-    "Dense crab pot field along 60 ft contour heading south."
-  ],
-  "bite_windows": [
-    {{
-      "label": "Dawn Window",
-      "window": "5:20 AM - 7:40 AM",
-      "action": "Drop metal jigs on reef peak",
-      "tide": "Slack flood",
-      "confidence": "High"
-    }},
-    {{
-      "label": "Late Morning",
-      "window": "10:30 AM - 12:00 PM",
-      "action": "Slow drift bait rigs",
-      "tide": "First ebb push",
-      "confidence": "Medium"
-    }},
-    {{
-      "label": "Plan B",
-      "window": "2:30 PM - 4:00 PM",
-      "action": "Slide inside kelp edges for halibut",
-      "tide": "Building ebb · wind 15+ kt",
-      "confidence": "Contingency"
-    }}
-  ],
-  "hourly": [
-    {{
-      "label": "Now",
-      "time": "5:30 AM",
-      "wind": "NW 8 kt",
-      "gust": "12 kt",
-      "seas": "2.4 ft @ 9s",
-      "current": "0.5 kt NW",
-      "comment": "Prime drop",
-      "rating": "good"
-    }},
-    {{
-      "label": "07:00",
-      "time": "7:00 AM",
-      "wind": "NW 9 kt",
-      "gust": "13 kt",
-      "seas": "2.6 ft @ 9s",
-      "current": "0.6 kt NW",
-      "comment": "Slack, stay on spot",
-      "rating": "good"
-    }},
-    {{
-      "label": "09:00",
-      "time": "9:00 AM",
-      "wind": "NW 11 kt",
-      "gust": "15 kt",
-      "seas": "3.0 ft @ 8s",
-      "current": "0.8 kt NW",
-      "comment": "Slide along ridge",
-      "rating": "fair"
-    }},
-    {{
-      "label": "11:00",
-      "time": "11:00 AM",
-      "wind": "NW 13 kt",
-      "gust": "18 kt",
-      "seas": "3.3 ft @ 7s",
-      "current": "1.0 kt NW",
-      "comment": "Building breeze",
-      "rating": "fair"
-    }},
-    {{
-      "label": "13:00",
-      "time": "1:00 PM",
-      "wind": "NW 15 kt",
-      "gust": "20 kt",
-      "seas": "3.6 ft @ 7s",
-      "current": "1.1 kt NW",
-      "comment": "Windline forming",
-      "rating": "caution"
-    }},
-    {{
-      "label": "15:00",
-      "time": "3:00 PM",
-      "wind": "NW 18 kt",
-      "gust": "24 kt",
-      "seas": "4.2 ft @ 7s",
-      "current": "1.4 kt NW",
-      "comment": "Shift inshore",
-      "rating": "planb"
-    }},
-    {{
-      "label": "17:00",
-      "time": "5:00 PM",
-      "wind": "NW 16 kt",
-      "gust": "21 kt",
-      "seas": "3.8 ft @ 7s",
-      "current": "1.2 kt NW",
-      "comment": "Evening wind easing",
-      "rating": "caution"
-    }},
-    {{
-      "label": "19:00",
-      "time": "7:00 PM",
-      "wind": "NW 12 kt",
-      "gust": "16 kt",
-      "seas": "3.0 ft @ 8s",
-      "current": "0.7 kt NW",
-      "comment": "Good evening window",
-      "rating": "good"
-    }},
-    {{
-      "label": "21:00",
-      "time": "9:00 PM",
-      "wind": "NW 8 kt",
-      "gust": "12 kt",
-      "seas": "2.2 ft @ 9s",
-      "current": "0.4 kt NW",
-      "comment": "Calming down",
-      "rating": "good"
-    }},
-    {{
-      "label": "23:00",
-      "time": "11:00 PM",
-      "wind": "NW 5 kt",
-      "gust": "8 kt",
-      "seas": "1.5 ft @ 10s",
-      "current": "0.2 kt NW",
-      "comment": "Overnight calm",
-      "rating": "good"
-    }}
-  ]
-}}"""
+        prompt = "\n\n".join([
+            _FORECAST_ROLE,
+            context,
+            _forecast_instructions(conditions),
+            _FORECAST_RESPONSE_FORMAT,
+        ])
 
         # Call Gemini API
-        response = self.model.generate_content(prompt)
-        result_text = response.text.strip()
-
-        # Extract JSON from markdown code blocks if present
-        if "```json" in result_text:
-            result_text = re.search(r'```json\s*(.*?)\s*```', result_text, re.DOTALL).group(1)
-        elif "```" in result_text:
-            result_text = re.search(r'```\s*(.*?)\s*```', result_text, re.DOTALL).group(1)
-
-        # Parse JSON
-        forecast_data = json.loads(result_text)
-
-        # Convert to Pydantic models
-        bite_windows = [BiteWindow(**window) for window in forecast_data['bite_windows']]
+        result_text = await self._generate_json(prompt, _FORECAST_CONFIG)
+        return self._build_forecast(_ForecastDraft.model_validate_json(result_text), hourly_forecast)
 
+    @staticmethod
+    def _build_forecast(draft: _ForecastDraft, hourly_forecast: list) -> FishermanForecast:
         # Use REAL hourly forecast data from Open-Meteo instead of AI-generated
-        hourly = [HourlyForecast(**entry) for entry in hourly_forecast] if hourly_forecast else []
-
-        return FishermanForecast(
-            location_name=forecast_data['location_name'],
-            condition_summary=forecast_data['condition_summary'],
-            sea_surface_temp=forecast_data['sea_surface_temp'],
-            air_temp=forecast_data['air_temp'],
-            marine_summary=forecast_data.get('marine_summary'),
-            solunar=forecast_data['solunar'],
-            swell_summary=forecast_data['swell_summary'],
-            tide_summary=forecast_data['tide_summary'],
-            warnings=forecast_data['warnings'],
-            bite_windows=bite_windows,
-            hourly=hourly
-        )
+        hourly = _HOURLY_ADAPTER.validate_python(hourly_forecast) if hourly_forecast else []
+
+        # Bite windows were already validated against the response schema
+        return FishermanForecast(**dict(draft), hourly=hourly)
 
     async def _call_local_model_plan(self, request: PlanRequest, conditions) -> dict:
-        """Attempt to call local model for plan generation (will always fail)"""
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                'http://localhost:11434/api/generate',  # Ollama-style endpoint
-                json={
-                    'model': 'llama3',
-                    'prompt': f"Generate fishing plan for {request.location.lat}, {request.location.lng}"
-                },
-                timeout=aiohttp.ClientTimeout(total=2)
-            ) as resp:
-                if resp.status != 200:
-                    raise Exception("Local model not available")
-                return await resp.json()
\ No newline at end of file
+        """Attempt to call the local model at LOCAL_MODEL_URL for plan generation"""
+        resp = await self._http.post(
+            self._local_model_url,  # Ollama-style endpoint
+            json={
+                'model': 'llama3',
+                'prompt': f"Generate fishing plan for {request.location.lat}, {request.location.lng}"
+            },
+            timeout=2
+        )
+        if resp.status_code != 200:
+            raise Exception("Local model not available")
+        return resp.json()
@@ -1,107 +1,193 @@
 import asyncio
-import base64
+import binascii
 import logging
 import os
-from typing import Dict, List, Optional
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import google.generativeai as genai
+import httpx
 
 from models.schemas import DetectedObjects, SonarRequest, SonarResponse
+from services.gemini_service import get_gemini_model
 
 logger = logging.getLogger(__name__)
 
 
-def _configure_gemini(api_key: Optional[str]) -> None:
-    if not api_key:
-        raise ValueError(
-            "GEMINI_API_KEY is not set. Add it to your environment or .env file."
-        )
-
-    if not getattr(_configure_gemini, "_configured", False):
-        genai.configure(api_key=api_key)
-        _configure_gemini._configured = True
-
-
-def _build_prompt() -> str:
-    return (
-        "You are Leviathan's expert sonar analysis assistant for commercial small-boat fishing operations. "
-        "Analyze this sonar/fishfinder screenshot in detail.\n\n"
-        "CONTEXT: This is for a solo or small-crew commercial fishing vessel using nets (gillnets, purse seines, cast nets) "
-        "and other commercial gear. Focus on commercial viability, school size for netting, and efficient targeting.\n\n"
-        "Provide a comprehensive analysis including:\n\n"
-        "1. FISH DETECTION:\n"
-        "   - Count all visible fish arches/marks. Note that it may just be a colored dot for a fish or a huge blob for a school of fish. If so, do your best to estimate, do not return 0.\n"
-        "   - Identify fish size indicators (large arches = bigger fish, small marks = baitfish)\n"
-        "   - Note suspended fish vs bottom-hugging fish\n"
-        "   - Assess if school is large enough for commercial netting operations\n\n"
-        "2. SCHOOL CHARACTERISTICS:\n"
-        "   - Primary depth in feet where most fish are holding (this is the target depth for nets)\n"
-        "   - Density: sparse (not worth setting nets), moderate (viable school), or dense (prime target)\n"
-        "   - Horizontal width of school in feet (important for net deployment)\n"
-        "   - School movement direction if discernible\n\n"
-        "3. STRUCTURE & ENVIRONMENT:\n"
-        "   - Bottom structure: flat/rocky/drop-off/ledge\n"
-        "   - Bottom depth in feet (total water depth, important for avoiding snags)\n"
-        "   - Thermocline presence and depth (temperature break where fish often stack)\n"
-        "   - Water column features (baitfish balls, debris, etc.)\n\n"
-        "4. COMMERCIAL FISHING INTELLIGENCE:\n"
-        "   - Species likelihood based on depth, structure, and behavior\n"
-        "   - Best commercial method (gillnet depth, purse seine deployment, cast net from deck)\n"
-        "   - Optimal net deployment depth and approach\n"
-        "   - Whether to set nets here or move to better marks\n"
-        "   - Snag risk assessment based on bottom type\n\n"
-        "Format your response EXACTLY as follows:\n"
-        "FISH_ARCHES: <number>\n"
-        "DEPTH: <feet where fish school is located>\n"
-        "DENSITY: <sparse|moderate|dense>\n"
-        "WIDTH: <feet>\n"
-        "BOTTOM_STRUCTURE: <yes|no>\n"
-        "BOTTOM_TYPE: <flat|rocky|drop-off|ledge|unknown>\n"
-        "BOTTOM_DEPTH: <total water depth in feet>\n"
-        "THERMOCLINE: <feet or none>\n"
-        "FISH_SIZE: <small|medium|large|mixed>\n"
-        "FISH_BEHAVIOR: <suspended|bottom|scattered|schooling>\n"
-        "BAITFISH_PRESENT: <yes|no>\n"
-        "SPECIES_GUESS: <likely species based on signals>\n"
-        "CONFIDENCE: <0.0-1.0>\n"
-        "RECOMMENDATION: <detailed 2-3 sentence action plan with specific net deployment depth, method, and whether to set or move>"
-    )
+_PROMPT = (
+    "You are Leviathan's expert sonar analysis assistant for commercial small-boat fishing operations. "
+    "Analyze this sonar/fishfinder screenshot in detail.\n\n"
+    "CONTEXT: This is for a solo or small-crew commercial fishing vessel using nets (gillnets, purse seines, cast nets) "
+    "and other commercial gear. Focus on commercial viability, school size for netting, and efficient targeting.\n\n"
+    "Provide a comprehensive analysis including:\n\n"
+    "1. FISH DETECTION:\n"
+    "   - Count all visible fish arches/marks. Note that it may just be a colored dot for a fish or a huge blob for a school of fish. If so, do your best to estimate, do not return 0.\n"
+    "   - Identify fish size indicators (large arches = bigger fish, small marks = baitfish)\n"
+    "   - Note suspended fish vs bottom-hugging fish\n"
+    "   - Assess if school is large enough for commercial netting operations\n\n"
+    "2. SCHOOL CHARACTERISTICS:\n"
+    "   - Primary depth in feet where most fish are holding (this is the target depth for nets)\n"
+    "   - Density: sparse (not worth setting nets), moderate (viable school), or dense (prime target)\n"
+    "   - Horizontal width of school in feet (important for net deployment)\n"
+    "   - School movement direction if discernible\n\n"
+    "3. STRUCTURE & ENVIRONMENT:\n"
+    "   - Bottom structure: flat/rocky/drop-off/ledge\n"
+    "   - Bottom depth in feet (total water depth, important for avoiding snags)\n"
+    "   - Thermocline presence and depth (temperature break where fish often stack)\n"
+    "   - Water column features (baitfish balls, debris, etc.)\n\n"
+    "4. COMMERCIAL FISHING INTELLIGENCE:\n"
+    "   - Species likelihood based on depth, structure, and behavior\n"
+    "   - Best commercial method (gillnet depth, purse seine deployment, cast net from deck)\n"
+    "   - Optimal net deployment depth and approach\n"
+    "   - Whether to set nets here or move to better marks\n"
+    "   - Snag risk assessment based on bottom type\n\n"
+    "Format your response EXACTLY as follows:\n"
+    "FISH_ARCHES: <number>\n"
+    "DEPTH: <feet where fish school is located>\n"
+    "DENSITY: <sparse|moderate|dense>\n"
+    "WIDTH: <feet>\n"
+    "BOTTOM_STRUCTURE: <yes|no>\n"
+    "BOTTOM_TYPE: <flat|rocky|drop-off|ledge|unknown>\n"
+    "BOTTOM_DEPTH: <total water depth in feet>\n"
+    "THERMOCLINE: <feet or none>\n"
+    "FISH_SIZE: <small|medium|large|mixed>\n"
+    "FISH_BEHAVIOR: <suspended|bottom|scattered|schooling>\n"
+    "BAITFISH_PRESENT: <yes|no>\n"
+    "SPECIES_GUESS: <likely species based on signals>\n"
+    "CONFIDENCE: <0.0-1.0>\n"
+    "RECOMMENDATION: <detailed 2-3 sentence action plan with specific net deployment depth, method, and whether to set or move>"
+)
+
+_PNG_DATA_URI_PREFIX = "data:image/png;base64,"
+# Mime type and payload offset of any other data URI in one match
+_DATA_URI_RE = re.compile(r"data:([^;,]*)[^,]*,")
+
+# Matches every "FIELD: value" line of the structured reply in one scan
+_FIELD_RE = re.compile(
+    r"^[ \t]*(FISH_ARCHES|DEPTH|DENSITY|WIDTH|BOTTOM_STRUCTURE|BOTTOM_TYPE|BOTTOM_DEPTH|THERMOCLINE"
+    r"|FISH_SIZE|FISH_BEHAVIOR|BAITFISH_PRESENT|SPECIES_GUESS|CONFIDENCE|RECOMMENDATION)"
+    r"[ \t]*:[ \t]*(.*?)[ \t\r]*$",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+_DIGITS_RE = re.compile(r"\d+")
+_DENSITY_RE = re.compile(r"\b(sparse|moderate|dense)\b", re.IGNORECASE)
+
+
+def _parse_int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def _first_int(value: str, default: Optional[int] = 0) -> Optional[int]:
+    # Extract the first number (e.g., "45 feet" -> 45, "~120 ft" -> 120)
+    match = _DIGITS_RE.search(value)
+    return int(match.group()) if match else default
+
+
+def _parse_feet(value: str) -> int:
+    return _first_int(value)
+
+
+def _parse_density(value: str) -> str:
+    match = _DENSITY_RE.search(value)
+    return match.group(1).lower() if match else "unknown"
+
+
+def _parse_width(value: str) -> str:
+    try:
+        return value.split()[0] + " ft"
+    except IndexError:
+        return "unknown"
+
+
+def _parse_yes_no(value: str) -> bool:
+    return "yes" in value.lower()
+
+
+def _parse_thermocline(value: str) -> Optional[int]:
+    if "none" in value.lower():
+        return None
+    return _first_int(value, None)
+
+
+def _parse_confidence(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return 0.5
+
+
+def _parse_text(value: str) -> str:
+    return value
+
+
+# One converter per field matched by _FIELD_RE, keyed by the lowercased name
+_FIELD_HANDLERS: Dict[str, Callable[[str], Any]] = {
+    "fish_arches": _parse_int,
+    "depth": _parse_feet,
+    "density": _parse_density,
+    "width": _parse_width,
+    "bottom_structure": _parse_yes_no,
+    "bottom_type": str.lower,
+    "bottom_depth": _parse_feet,
+    "thermocline": _parse_thermocline,
+    "fish_size": str.lower,
+    "fish_behavior": str.lower,
+    "baitfish_present": _parse_yes_no,
+    "species_guess": _parse_text,
+    "confidence": _parse_confidence,
+    "recommendation": _parse_text,
+}
 
 
 class SonarService:
-    def __init__(self, model_name: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
         self._model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
         self._model: Optional[genai.GenerativeModel] = None
+        self._http = http_client or httpx.AsyncClient(timeout=10)
+        # Optional Ollama-style endpoint, e.g. http://localhost:11434/api/generate
+        self._local_model_url = os.getenv("LOCAL_MODEL_URL")
+        self._gemini_sem = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")))
 
     async def analyze_sonar(self, request: SonarRequest) -> SonarResponse:
         if not request.image:
             raise ValueError("Sonar image payload is required.")
 
-        # Try local model first (will always fail as we don't have one running)
-        try:
-            return await self._call_local_model_sonar(request)
-        except Exception as local_error:
-            logger.info(f"Local model unavailable, falling back to Gemini: {local_error}")
-            # Fall through to Gemini
+        # Try the local model first when one is configured
+        if self._local_model_url:
+            try:
+                return await self._call_local_model_sonar(request)
+            except Exception as local_error:
+                logger.info(f"Local model unavailable, falling back to Gemini: {local_error}")
+                # Fall through to Gemini
 
-        prompt = _build_prompt()
         image_parts = self._prepare_image_parts(request.image)
 
-        response_text = await self._generate_content(prompt, image_parts)
+        response_text = await self._generate_content(_PROMPT, image_parts)
 
         # Parse structured response
         parsed = self._parse_sonar_response(response_text)
 
-        return SonarResponse(
-            depth=parsed.get("depth", 0),
+        # Every value comes from a typed field handler (or a typed default), so
+        # build the response without running validation a second time
+        thermocline = parsed.get("thermocline")
+        return SonarResponse.model_construct(
+            depth=float(parsed.get("depth", 0)),
             density=parsed.get("density", "unknown"),
             school_width=parsed.get("width", "unknown"),
             confidence=parsed.get("confidence", 0.5),
             recommendation=parsed.get("recommendation", response_text),
-            detected_objects=DetectedObjects(
+            detected_objects=DetectedObjects.model_construct(
                 fish_arches=parsed.get("fish_arches", 0),
                 bottom_structure=parsed.get("bottom_structure", False),
-                thermocline=parsed.get("thermocline", None),
+                thermocline=None if thermocline is None else float(thermocline),
             ),
             bottom_type=parsed.get("bottom_type"),
             bottom_depth=parsed.get("bottom_depth"),
@@ -111,12 +197,11 @@ class SonarService:
             species_guess=parsed.get("species_guess"),
         )
 
-    async def _generate_content(self, prompt: str, image_parts: List[Dict[str, bytes]]) -> str:
+    async def _generate_content(self, prompt: str, image_parts: Tuple[Dict[str, Any], ...]) -> str:
         try:
-            response = await asyncio.to_thread(
-                self._ensure_model().generate_content,
-                [prompt, *image_parts],
-            )
+            # Bounded like the planning calls so bursts queue instead of spawning threads
+            async with self._gemini_sem:
+                response = await self._ensure_model().generate_content_async([prompt, *image_parts])
         except Exception as exc:  # pragma: no cover - log unexpected API errors
             logger.exception("Gemini content generation failed")
             raise RuntimeError("Failed to generate sonar analysis") from exc
@@ -127,133 +212,62 @@ class SonarService:
 
         return response.text.strip()
 
-    def _prepare_image_parts(self, image_data_uri: str) -> List[Dict[str, bytes]]:
-        if image_data_uri.startswith("data:"):
-            header, encoded = image_data_uri.split(",", 1)
-            mime_type = header.split(";")[0].replace("data:", "") or "image/png"
+    def _prepare_image_parts(self, image_data_uri: str) -> Tuple[Dict[str, Any], ...]:
+        # The frontend always sends PNG data URIs, so skip header parsing for those
+        if image_data_uri.startswith(_PNG_DATA_URI_PREFIX):
+            mime_type = "image/png"
+            start = len(_PNG_DATA_URI_PREFIX)
+        elif image_data_uri.startswith("data:"):
+            header = _DATA_URI_RE.match(image_data_uri)
+            if header is None:
+                raise ValueError("Invalid base64 image payload")
+            mime_type = header.group(1) or "image/png"
+            start = header.end()
         else:
             mime_type = "image/png"
-            encoded = image_data_uri
+            start = 0
 
         try:
-            image_bytes = base64.b64decode(encoded)
+            # a2b_base64 reads an ASCII str in place, so only the slice is copied
+            # (b64decode would re-encode the multi-MB payload to bytes first)
+            image_bytes = binascii.a2b_base64(image_data_uri[start:])
         except Exception as exc:
             raise ValueError("Invalid base64 image payload") from exc
 
-        return [
-            {
-                "mime_type": mime_type,
-                "data": image_bytes,
-            }
-        ]
+        return ({"mime_type": mime_type, "data": image_bytes},)
 
     def _parse_sonar_response(self, response_text: str) -> Dict:
         """Parse structured sonar analysis from Gemini response."""
         parsed = {}
-        lines = response_text.strip().split("\n")
-
-        for line in lines:
-            line = line.strip()
-            if ":" not in line:
-                continue
-
-            key, value = line.split(":", 1)
-            key = key.strip().lower()
-            value = value.strip()
-
-            if key == "fish_arches":
-                try:
-                    parsed["fish_arches"] = int(value)
-                except ValueError:
-                    parsed["fish_arches"] = 0
-
-            elif key == "depth":
-                try:
-                    # Extract numeric value (e.g., "45 feet" -> 45)
-                    parsed["depth"] = int("".join(filter(str.isdigit, value.split()[0])))
-                except (ValueError, IndexError):
-                    parsed["depth"] = 0
-
-            elif key == "density":
-                value_lower = value.lower()
-                if any(d in value_lower for d in ["sparse", "moderate", "dense"]):
-                    parsed["density"] = value_lower.split()[0]
-                else:
-                    parsed["density"] = "unknown"
-
-            elif key == "width":
-                try:
-                    parsed["width"] = value.split()[0] + " ft"
-                except IndexError:
-                    parsed["width"] = "unknown"
-
-            elif key == "bottom_structure":
-                parsed["bottom_structure"] = "yes" in value.lower()
-
-            elif key == "bottom_type":
-                parsed["bottom_type"] = value.lower()
-
-            elif key == "bottom_depth":
-                try:
-                    parsed["bottom_depth"] = int("".join(filter(str.isdigit, value.split()[0])))
-                except (ValueError, IndexError):
-                    parsed["bottom_depth"] = 0
-
-            elif key == "thermocline":
-                if "none" in value.lower():
-                    parsed["thermocline"] = None
-                else:
-                    try:
-                        parsed["thermocline"] = int("".join(filter(str.isdigit, value.split()[0])))
-                    except (ValueError, IndexError):
-                        parsed["thermocline"] = None
-
-            elif key == "fish_size":
-                parsed["fish_size"] = value.lower()
-
-            elif key == "fish_behavior":
-                parsed["fish_behavior"] = value.lower()
-
-            elif key == "baitfish_present":
-                parsed["baitfish_present"] = "yes" in value.lower()
-
-            elif key == "species_guess":
-                parsed["species_guess"] = value
-
-            elif key == "confidence":
-                try:
-                    parsed["confidence"] = float(value)
-                except ValueError:
-                    parsed["confidence"] = 0.5
-
-            elif key == "recommendation":
-                parsed["recommendation"] = value
+
+        for match in _FIELD_RE.finditer(response_text):
+            key = match.group(1).lower()
+            parsed[key] = _FIELD_HANDLERS[key](match.group(2))
 
         return parsed
 
     def _ensure_model(self) -> genai.GenerativeModel:
-        if self._model is not None:
-            return self._model
-
-        api_key = os.getenv("GEMINI_API_KEY")
-        _configure_gemini(api_key)
-
-        self._model = genai.GenerativeModel(self._model_name)
+        if self._model is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError(
+                    "GEMINI_API_KEY is not set. Add it to your environment or .env file."
+                )
+            # Shared per model name across every service in the process
+            self._model = get_gemini_model(self._model_name, api_key)
         return self._model
 
     async def _call_local_model_sonar(self, request: SonarRequest) -> SonarResponse:
-        """Attempt to call local model for sonar analysis (will always fail)"""
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                'http://localhost:11434/api/generate',  # Ollama-style endpoint
-                json={
-                    'model': 'llama3-vision',
-                    'prompt': 'Analyze this sonar image',
-                    'images': [request.image]
-                },
-                timeout=aiohttp.ClientTimeout(total=2)
-            ) as resp:
-                if resp.status != 200:
-                    raise Exception("Local model not available")
-                return await resp.json()
\ No newline at end of file
+        """Attempt to call the local model at LOCAL_MODEL_URL for sonar analysis"""
+        resp = await self._http.post(
+            self._local_model_url,  # Ollama-style endpoint
+            json={
+                'model': 'llama3-vision',
+                'prompt': 'Analyze this sonar image',
+                'images': [request.image]
+            },
+            timeout=2
+        )
+        if resp.status_code != 200:
+            raise Exception("Local model not available")
+        return resp.json()
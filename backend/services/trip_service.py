@@ -1,21 +1,25 @@
 import asyncio
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
 from datetime import datetime
 from models.schemas import (
     TripLog, TripStartRequest, TripUpdateRequest,
-    CatchRecord, CatchCreateRequest, MarineConditions, LocationModel
+    CatchRecord, CatchCreateRequest, CatchStats, MarineConditions, LocationModel
 )
 
 class TripService:
     def __init__(self):
         # In-memory storage for MVP
         # In production, this would use a database
-        self.trips: List[TripLog] = []
+        # Keyed by trip id; dicts keep insertion order, so listing stays chronological
+        self._trips: Dict[str, TripLog] = {}
         self.trip_counter = 0
+        # Columnar view of all catches, rebuilt lazily after add_catch
+        self._catch_stats: Optional[CatchStats] = None
 
     async def start_trip(self, request: TripStartRequest) -> TripLog:
         self.trip_counter += 1
-        trip_id = f"trip_{self.trip_counter}_{int(datetime.now().timestamp())}"
+        trip_id = f"trip_{self.trip_counter}_{int(time.time())}"
 
         trip = TripLog(
             id=trip_id,
@@ -32,61 +36,78 @@ class TripService:
             )
         )
 
-        self.trips.append(trip)
+        self._trips[trip_id] = trip
         return trip
 
     async def get_trips(self) -> List[TripLog]:
-        return self.trips
+        return list(self._trips.values())
+
+    async def get_catch_stats(self) -> CatchStats:
+        if self._catch_stats is None:
+            columns = {name: [] for name in CatchStats.model_fields}
+            for trip in self._trips.values():
+                for catch in trip.catches:
+                    freshness = catch.freshness_score
+                    columns['trip_id'].append(trip.id)
+                    columns['catch_id'].append(catch.id)
+                    columns['timestamp'].append(catch.timestamp)
+                    columns['species'].append(catch.species)
+                    columns['weight'].append(catch.weight)
+                    columns['length'].append(catch.length)
+                    columns['depth'].append(catch.depth)
+                    columns['lat'].append(catch.location.lat)
+                    columns['lng'].append(catch.location.lng)
+                    columns['freshness_overall'].append(freshness.overall if freshness else None)
+                    columns['freshness_grade'].append(freshness.grade if freshness else None)
+            self._catch_stats = CatchStats(**columns)
+        return self._catch_stats
 
     async def get_trip(self, trip_id: str) -> Optional[TripLog]:
-        for trip in self.trips:
-            if trip.id == trip_id:
-                return trip
-        return None
+        return self._trips.get(trip_id)
 
     async def update_trip(self, trip_id: str, updates: TripUpdateRequest) -> Optional[TripLog]:
-        for i, trip in enumerate(self.trips):
-            if trip.id == trip_id:
-                # Update trip with new values
-                if updates.end_time is not None:
-                    trip.end_time = updates.end_time
-                if updates.fuel_used is not None:
-                    trip.fuel_used = updates.fuel_used
-                if updates.notes is not None:
-                    trip.notes = updates.notes
-                if updates.conditions is not None:
-                    trip.conditions = updates.conditions
+        trip = self._trips.get(trip_id)
+        if trip is None:
+            return None
 
-                self.trips[i] = trip
-                return trip
-        return None
+        # Update trip with new values
+        if updates.end_time is not None:
+            trip.end_time = updates.end_time
+        if updates.fuel_used is not None:
+            trip.fuel_used = updates.fuel_used
+        if updates.notes is not None:
+            trip.notes = updates.notes
+        if updates.conditions is not None:
+            trip.conditions = updates.conditions
+        return trip
 
     async def end_trip(self, trip_id: str) -> Optional[TripLog]:
-        for i, trip in enumerate(self.trips):
-            if trip.id == trip_id:
-                trip.end_time = datetime.now().isoformat()
-                self.trips[i] = trip
-                return trip
-        return None
+        trip = self._trips.get(trip_id)
+        if trip is None:
+            return None
+
+        trip.end_time = datetime.now().isoformat()
+        return trip
 
     async def add_catch(self, trip_id: str, catch_request: CatchCreateRequest) -> Optional[CatchRecord]:
-        for i, trip in enumerate(self.trips):
-            if trip.id == trip_id:
-                catch_id = f"catch_{len(trip.catches) + 1}_{int(datetime.now().timestamp())}"
+        trip = self._trips.get(trip_id)
+        if trip is None:
+            return None
+
+        catch_id = f"catch_{len(trip.catches) + 1}_{int(time.time())}"
 
-                catch_record = CatchRecord(
-                    id=catch_id,
-                    timestamp=catch_request.timestamp,
-                    species=catch_request.species,
-                    weight=catch_request.weight,
-                    length=catch_request.length,
-                    depth=catch_request.depth,
-                    freshness_score=catch_request.freshness_score,
-                    sonar_reading=catch_request.sonar_reading,
-                    location=catch_request.location
-                )
+        catch_record = CatchRecord(
+            id=catch_id,
+            timestamp=catch_request.timestamp,
+            species=catch_request.species,
+            weight=catch_request.weight,
+            length=catch_request.length,
+            depth=catch_request.depth,
+            freshness_score=catch_request.freshness_score,
+            sonar_reading=catch_request.sonar_reading,
+            location=catch_request.location
+        )
 
-                trip.catches.append(catch_record)
-                self.trips[i] = trip
-                return catch_record
-        return None
\ No newline at end of file
+        trip.catches.append(catch_record)
+        self._catch_stats = None
+        return catch_record
\ No newline at end of file
@@ -4,13 +4,16 @@ Main application loop for screen capture, CV detection, Groq refinement, and TTS
 """
 
 import asyncio
+import heapq
 import logging
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import cv2
+import httpx
 import mss
 import numpy as np
 import yaml
@@ -36,6 +39,55 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Frames allowed to wait between pipeline stages; older frames are dropped
+PIPELINE_QUEUE_SIZE = 2
+
+# Capture buffers handed round a free list: enough to cover every frame that can
+# be queued or in use downstream (two queues, CV, display, and the next grab)
+CAPTURE_RING_SIZE = 2 * PIPELINE_QUEUE_SIZE + 3
+
+# Frames whose downsampled grayscale differs from the last processed frame by
+# less than this L1 distance (mean 2 gray levels) reuse its detections
+FRAME_DIFF_SIZE = 64
+FRAME_DIFF_THRESHOLD = FRAME_DIFF_SIZE * FRAME_DIFF_SIZE * 2
+
+# Full-width depth lines are drawn for the largest detections only
+DEPTH_LINE_MAX = 3
+
+# Box colors by density class (BGR)
+DENSITY_COLORS = {
+    "dense": (0, 255, 0),  # Green
+    "moderate": (0, 255, 255),  # Yellow
+    "sparse": (0, 165, 255),  # Orange
+}
+
+
+class Annotation(NamedTuple):
+    """Per-frame derived values for one detection."""
+
+    detection: Detection
+    depth_ft: float
+    size: str
+    density_class: str
+    color: Tuple[int, int, int]
+    label: str
+
+
+@lru_cache(maxsize=128)
+def _text_size(text: str, font: int, scale: float, thickness: int) -> Tuple[Tuple[int, int], int]:
+    """Cached cv2.getTextSize; recommendation lines repeat across frames."""
+    return cv2.getTextSize(text, font, scale, thickness)
+
+
+def _put_latest(queue: asyncio.Queue, item):
+    """Enqueue item, dropping the oldest entry when the queue is full.
+
+    Returns the dropped entry, or None.
+    """
+    dropped = queue.get_nowait() if queue.full() else None
+    queue.put_nowait(item)
+    return dropped
+
 
 class SonarAssist:
     """Main application class for real-time sonar analysis."""
@@ -51,12 +103,20 @@ class SonarAssist:
         self.config_path = config_path or self._get_default_config_path()
         self.config = self._load_config()
 
+        # One keep-alive HTTP/2 pool for Groq so sampled queries skip the handshake
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=self.config['groq']['timeout_sec'],
+            limits=httpx.Limits(max_keepalive_connections=8)
+        )
+
         # Initialize components
         self.calibrator = DepthCalibrator(self.config_path)
         self.groq_cv = GroqCV(
             model_id=self.config['groq']['model_id'],
             endpoint=self.config['groq']['endpoint'],
-            timeout=self.config['groq']['timeout_sec']
+            timeout=self.config['groq']['timeout_sec'],
+            http_client=self._http
         )
         self.tts = TTSElevenLabs(
             voice_id=self.config['elevenlabs']['voice_id'],
@@ -75,19 +135,38 @@ class SonarAssist:
         # State
         self.roi = None  # (x, y, w, h) Region of Interest
         self.running = False
-        self.paused = False
+        self._resume_evt = asyncio.Event()  # Set while running, cleared while paused
+        self._resume_evt.set()
         self.frame_count = 0
         self.fps = 0
         self.last_fps_time = time.time()
         self.show_overlay = True
+        self.last_groq_result = None
+        self.last_groq_time = 0.0
+        self._last_small = None
+        self._last_result = None
 
         # Screen capture
         self.sct = mss.mss()
         self.monitor_index = self.config['capture']['monitor_index']
+        self._capture_slots: List[Optional[np.ndarray]] = [None] * CAPTURE_RING_SIZE
+        self._overlay_buf = None
 
         logger.info("Sonar Assist initialized")
         self._print_status()
 
+    @property
+    def paused(self) -> bool:
+        """Whether capture is paused."""
+        return not self._resume_evt.is_set()
+
+    @paused.setter
+    def paused(self, value: bool):
+        if value:
+            self._resume_evt.clear()
+        else:
+            self._resume_evt.set()
+
     def _get_default_config_path(self) -> str:
         """Get default config file path."""
         module_dir = Path(__file__).parent
@@ -136,7 +215,9 @@ class SonarAssist:
         # Capture full screen
         monitor = self.sct.monitors[self.monitor_index + 1]  # +1 because 0 is all monitors
         screenshot = self.sct.grab(monitor)
-        frame = np.array(screenshot)
+        frame = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(
+            screenshot.height, screenshot.width, 4
+        )
         frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
 
         # Select ROI
@@ -174,10 +255,14 @@ class SonarAssist:
         else:
             print("✗ Depth calibration failed\n")
 
-    def _capture_roi(self) -> Optional[np.ndarray]:
+    def _capture_roi(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
         """
         Capture current ROI from screen.
 
+        Args:
+            out: Optional buffer to convert into; a new one is allocated
+                if its shape does not match the capture
+
         Returns:
             BGR frame or None if failed
         """
@@ -197,24 +282,28 @@ class SonarAssist:
             }
 
             screenshot = self.sct.grab(bbox)
-            frame = np.array(screenshot)
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+            h, w = screenshot.height, screenshot.width
 
-            return frame
+            # View the raw BGRA pixels without copying and convert straight
+            # into the caller's buffer
+            bgra = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(h, w, 4)
+            if out is not None and out.shape != (h, w, 3):
+                out = None
+            return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=out)
 
         except Exception as e:
             logger.error(f"Failed to capture ROI: {e}")
             return None
 
-    async def process_frame(self, frame: np.ndarray) -> Tuple[np.ndarray, Optional[str]]:
+    def _detect(self, frame: np.ndarray) -> Tuple[list, Dict]:
         """
-        Process single frame: detect, track, decide, generate cue.
+        Run classical CV detection and tracking on a frame.
 
         Args:
             frame: Input BGR frame
 
         Returns:
-            (annotated_frame, recommendation_text)
+            (detections, tracked_objects)
         """
         # Preprocess
         processed = preprocess_frame(frame, self.config['cv'])
@@ -228,37 +317,137 @@ class SonarAssist:
         # Update tracker
         tracked_objects = self.tracker.update(detections)
 
-        # Groq refinement (optional, sampled)
-        groq_result = None
-        if self.config['groq']['use_groq']:
-            should_query = self.groq_cv.should_query(
-                frame_count=self.frame_count,
-                sample_rate_hz=self.config['groq']['sample_rate_hz'],
-                fps=self.fps
-            )
+        return detections, tracked_objects
+
+    def _detect_if_changed(self, frame: np.ndarray) -> Tuple[list, Dict]:
+        """
+        Run _detect unless the frame is nearly identical to the last one processed.
+
+        Args:
+            frame: Input BGR frame
+
+        Returns:
+            (detections, tracked_objects), reused from the last processed frame
+            when the ROI has not visibly changed
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, (FRAME_DIFF_SIZE, FRAME_DIFF_SIZE), interpolation=cv2.INTER_AREA)
+
+        if self._last_small is not None:
+            diff = cv2.norm(small, self._last_small, cv2.NORM_L1)
+            if diff < FRAME_DIFF_THRESHOLD:
+                return self._last_result
 
-            if should_query and len(detections) > 0:
-                # Query Groq on largest detection
-                largest = max(detections, key=lambda d: d.area)
-                x, y, w, h = largest.bbox
-                crop = (x, y, w, h)
+        self._last_result = self._detect(frame)
+        self._last_small = small
+        return self._last_result
 
-                groq_result = await self.groq_cv.analyze(frame, crop=crop)
-                logger.debug(f"Groq result: {groq_result}")
+    def _groq_crop(self, detections: list) -> Optional[tuple]:
+        """
+        Pick the crop to send to Groq for this frame, if sampling is due.
 
+        Args:
+            detections: List of Detection objects
+
+        Returns:
+            (x, y, w, h) of the largest detection, or None to skip Groq
+        """
+        if not self.config['groq']['use_groq'] or not detections:
+            return None
+
+        should_query = self.groq_cv.should_query(
+            frame_count=self.frame_count,
+            sample_rate_hz=self.config['groq']['sample_rate_hz'],
+            fps=self.fps
+        )
+        if not should_query:
+            return None
+
+        # Query Groq on largest detection
+        largest = max(detections, key=lambda d: d.area)
+        return largest.bbox
+
+    def _fresh_groq_result(self) -> Optional[Dict]:
+        """Return the latest Groq result if it is recent enough to trust."""
+        sample_rate_hz = self.config['groq']['sample_rate_hz']
+        max_age = 2.0 / sample_rate_hz if sample_rate_hz > 0 else 0.0
+        if time.time() - self.last_groq_time > max_age:
+            return None
+        return self.last_groq_result
+
+    async def process_frame(self, frame: np.ndarray) -> Tuple[np.ndarray, Optional[str]]:
+        """
+        Process single frame: detect, track, decide, generate cue.
+
+        Uses the same steps as the live pipeline, fusing the latest Groq
+        result rather than querying Groq inline.
+
+        Args:
+            frame: Input BGR frame
+
+        Returns:
+            (annotated_frame, recommendation_text)
+        """
+        detections, tracked_objects = self._detect_if_changed(frame)
+        return self._render(frame, detections, tracked_objects)
+
+    def _render(
+        self,
+        frame: np.ndarray,
+        detections: list,
+        tracked_objects: Dict
+    ) -> Tuple[np.ndarray, Optional[str]]:
+        """
+        Turn detections into a recommendation and an annotated frame.
+
+        Args:
+            frame: Input BGR frame
+            detections: List of Detection objects
+            tracked_objects: Tracked objects dict
+
+        Returns:
+            (annotated_frame, recommendation_text)
+        """
         # Generate recommendation
+        annotations = self._annotate(detections)
         recommendation = self._generate_recommendation(
-            detections, tracked_objects, groq_result
+            annotations, tracked_objects, self._fresh_groq_result()
         )
 
         # Draw overlay
-        annotated = self._draw_overlay(frame, detections, tracked_objects, recommendation)
+        annotated = self._draw_overlay(frame, annotations, tracked_objects, recommendation)
 
         return annotated, recommendation
 
+    def _annotate(self, detections: list) -> List[Annotation]:
+        """
+        Compute depth, size, density and label once per detection.
+
+        Args:
+            detections: List of Detection objects
+
+        Returns:
+            Annotation for each detection, in the same order
+        """
+        depths = self.calibrator.pixel_to_depth_array([d.mid_y() for d in detections])
+
+        annotations = []
+        for detection, depth_ft in zip(detections, depths.tolist()):
+            size = calculate_school_size(detection)
+            density_class = classify_density(detection.density, self.config['cv'])
+            annotations.append(Annotation(
+                detection=detection,
+                depth_ft=depth_ft,
+                size=size,
+                density_class=density_class,
+                color=DENSITY_COLORS[density_class],
+                label=f"{depth_ft:.0f}ft | {size} | {density_class}",
+            ))
+        return annotations
+
     def _generate_recommendation(
         self,
-        detections: list,
+        annotations: List[Annotation],
         tracked_objects: Dict,
         groq_result: Optional[Dict]
     ) -> Optional[str]:
@@ -266,14 +455,14 @@ class SonarAssist:
         Generate actionable recommendation based on detections.
 
         Args:
-            detections: List of Detection objects
+            annotations: Annotated detections from _annotate
             tracked_objects: Tracked objects dict
             groq_result: Optional Groq analysis result
 
         Returns:
             Recommendation text or None
         """
-        if not detections:
+        if not annotations:
             return None
 
         # Filter by Groq if available
@@ -282,12 +471,13 @@ class SonarAssist:
                 return f"Likely {groq_result['class']} - ignore for now."
 
         # Find largest/best detection
-        best_detection = max(detections, key=lambda d: d.area * d.tightness)
+        best = max(annotations, key=lambda a: a.detection.area * a.detection.tightness)
+        best_detection = best.detection
 
         # Calculate metrics
-        size = calculate_school_size(best_detection)
-        density_class = classify_density(best_detection.density, self.config['cv'])
-        depth_ft = self.calibrator.pixel_to_depth(best_detection.mid_y())
+        size = best.size
+        density_class = best.density_class
+        depth_ft = best.depth_ft
 
         # Build recommendation
         if best_detection.tightness >= self.config['decision']['tight_school_compactness']:
@@ -313,7 +503,7 @@ class SonarAssist:
     def _draw_overlay(
         self,
         frame: np.ndarray,
-        detections: list,
+        annotations: List[Annotation],
         tracked_objects: Dict,
         recommendation: Optional[str]
     ) -> np.ndarray:
@@ -322,45 +512,50 @@ class SonarAssist:
 
         Args:
             frame: Input frame
-            detections: List of detections
+            annotations: Annotated detections from _annotate
             tracked_objects: Tracked objects
             recommendation: Recommendation text
 
         Returns:
-            Annotated frame
+            Annotated frame (a buffer reused on the next call)
         """
         if not self.show_overlay:
             return frame
 
-        annotated = frame.copy()
-
-        # Draw detections
-        for detection in detections:
-            x, y, w, h = detection.bbox
-            depth_ft = self.calibrator.pixel_to_depth(detection.mid_y())
-
-            # Box color based on density
-            density_class = classify_density(detection.density, self.config['cv'])
-            if density_class == "dense":
-                color = (0, 255, 0)  # Green
-            elif density_class == "moderate":
-                color = (0, 255, 255)  # Yellow
-            else:
-                color = (0, 165, 255)  # Orange
+        # Draw into a persistent buffer instead of allocating a copy per frame
+        if self._overlay_buf is None or self._overlay_buf.shape != frame.shape:
+            self._overlay_buf = np.empty_like(frame)
+        np.copyto(self._overlay_buf, frame)
+        annotated = self._overlay_buf
 
-            # Draw box
-            cv2.rectangle(annotated, (x, y), (x + w, y + h), color, 2)
-
-            # Draw depth line
-            mid_y = detection.mid_y()
-            cv2.line(annotated, (0, mid_y), (annotated.shape[1], mid_y), color, 1)
-
-            # Draw label
-            size = calculate_school_size(detection)
-            label = f"{depth_ft:.0f}ft | {size} | {density_class}"
+        # Draw boxes, one polylines call per density color
+        for color in DENSITY_COLORS.values():
+            bboxes = np.array(
+                [a.detection.bbox for a in annotations if a.color == color], dtype=np.int32
+            )
+            if len(bboxes):
+                x0, y0 = bboxes[:, 0], bboxes[:, 1]
+                x1, y1 = x0 + bboxes[:, 2], y0 + bboxes[:, 3]
+                corners = np.stack([
+                    np.stack([x0, y0], axis=1),
+                    np.stack([x1, y0], axis=1),
+                    np.stack([x1, y1], axis=1),
+                    np.stack([x0, y1], axis=1),
+                ], axis=1)
+                cv2.polylines(annotated, list(corners), True, color, 2)
+
+        # Draw depth lines
+        largest = heapq.nlargest(DEPTH_LINE_MAX, annotations, key=lambda a: a.detection.area)
+        for annotation in largest:
+            mid_y = annotation.detection.mid_y()
+            cv2.line(annotated, (0, mid_y), (annotated.shape[1], mid_y), annotation.color, 1)
+
+        # Draw labels
+        for annotation in annotations:
+            x, y, _, _ = annotation.detection.bbox
             cv2.putText(
-                annotated, label, (x, y - 5),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2
+                annotated, annotation.label, (x, y - 5),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, annotation.color, 2
             )
 
         # Draw recommendation
@@ -369,7 +564,7 @@ class SonarAssist:
             lines = recommendation.split('. ')
             y_offset = 30
             for line in lines:
-                (tw, th), _ = cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+                (tw, th), _ = _text_size(line, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
                 cv2.rectangle(annotated, (10, y_offset - th - 5), (20 + tw, y_offset + 5), (0, 0, 0), -1)
                 cv2.putText(
                     annotated, line, (15, y_offset),
@@ -392,6 +587,76 @@ class SonarAssist:
 
         return annotated
 
+    async def _capture_stage(
+        self,
+        capture_q: asyncio.Queue,
+        free_q: asyncio.Queue,
+        frame_time: float
+    ):
+        """Grab ROI frames at the target rate and hand them to the CV stage.
+
+        Each frame is written into a capture slot taken from free_q; the slot
+        goes back on free_q once the frame is dropped or displayed.
+        """
+        while self.running:
+            loop_start = time.time()
+
+            # Sleep until resumed instead of polling while paused
+            if not self._resume_evt.is_set():
+                await self._resume_evt.wait()
+                continue
+
+            slot = await free_q.get()
+            frame = await asyncio.to_thread(self._capture_roi, self._capture_slots[slot])
+            if frame is None:
+                free_q.put_nowait(slot)
+                await asyncio.sleep(0.1)
+                continue
+
+            self._capture_slots[slot] = frame
+            dropped = _put_latest(capture_q, (slot, frame))
+            if dropped is not None:
+                free_q.put_nowait(dropped[0])
+
+            # Frame rate control
+            elapsed = time.time() - loop_start
+            await asyncio.sleep(max(0.0, frame_time - elapsed))
+
+    async def _cv_stage(
+        self,
+        capture_q: asyncio.Queue,
+        cv_q: asyncio.Queue,
+        groq_q: asyncio.Queue,
+        free_q: asyncio.Queue
+    ):
+        """Detect and track on captured frames, sampling crops for Groq."""
+        while True:
+            slot, frame = await capture_q.get()
+            detections, tracked_objects = await asyncio.to_thread(self._detect_if_changed, frame)
+
+            crop = self._groq_crop(detections)
+            if crop is not None:
+                x, y, w, h = crop
+                _put_latest(groq_q, frame[y:y+h, x:x+w].copy())
+
+            dropped = _put_latest(cv_q, (slot, frame, detections, tracked_objects))
+            if dropped is not None:
+                free_q.put_nowait(dropped[0])
+
+    async def _groq_stage(self, groq_q: asyncio.Queue):
+        """Refine the latest sampled crop with Groq off the display path."""
+        while True:
+            crop_frame = await groq_q.get()
+            result = await self.groq_cv.analyze(crop_frame)
+            logger.debug(f"Groq result: {result}")
+            self.last_groq_result = result
+            self.last_groq_time = time.time()
+
+    def _on_stage_done(self, stage: asyncio.Task):
+        """Stop the main loop if a pipeline stage dies; the error is logged on shutdown."""
+        if not stage.cancelled() and stage.exception() is not None:
+            self.running = False
+
     async def run(self):
         """Main processing loop."""
         if self.roi is None:
@@ -409,56 +674,81 @@ class SonarAssist:
         window_name = "Sonar Assist"
         cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
 
-        while self.running:
-            loop_start = time.time()
+        # Capture, CV and Groq run as separate stages so a slow stage only
+        # drops frames instead of stalling the others
+        capture_q = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        cv_q = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        groq_q = asyncio.Queue(maxsize=1)
+        free_q = asyncio.Queue()
+        for slot in range(CAPTURE_RING_SIZE):
+            free_q.put_nowait(slot)
+        stages = [
+            asyncio.create_task(self._capture_stage(capture_q, free_q, frame_time), name="capture"),
+            asyncio.create_task(self._cv_stage(capture_q, cv_q, groq_q, free_q), name="cv"),
+            asyncio.create_task(self._groq_stage(groq_q), name="groq"),
+        ]
+        for stage in stages:
+            stage.add_done_callback(self._on_stage_done)
 
-            if not self.paused:
-                # Capture frame
-                frame = self._capture_roi()
-                if frame is None:
-                    await asyncio.sleep(0.1)
-                    continue
-
-                # Process frame
-                annotated, recommendation = await self.process_frame(frame)
-
-                # Speak recommendation
-                if recommendation and self.debouncer.should_speak(recommendation):
-                    asyncio.create_task(self.tts.speak(
-                        recommendation,
-                        debounce_sec=self.config['speech']['debounce_sec']
-                    ))
-
-                # Display
-                cv2.imshow(window_name, annotated)
-
-                # Update counters
-                self.frame_count += 1
-
-                # Calculate FPS
-                now = time.time()
-                if now - self.last_fps_time >= 1.0:
-                    self.fps = self.frame_count / (now - self.last_fps_time)
-                    self.frame_count = 0
-                    self.last_fps_time = now
-
-            # Handle keyboard
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q') or key == 27:  # Q or ESC
-                self.running = False
-            elif key == ord('p'):
-                self.paused = not self.paused
-                logger.info(f"{'Paused' if self.paused else 'Resumed'}")
-            elif key == ord('o'):
-                self.show_overlay = not self.show_overlay
-                logger.info(f"Overlay: {'ON' if self.show_overlay else 'OFF'}")
-
-            # Frame rate control
-            elapsed = time.time() - loop_start
-            if elapsed < frame_time:
-                await asyncio.sleep(frame_time - elapsed)
+        try:
+            while self.running:
+                try:
+                    slot, frame, detections, tracked_objects = await asyncio.wait_for(
+                        cv_q.get(), timeout=frame_time
+                    )
+                except asyncio.TimeoutError:
+                    frame = None
+
+                if frame is not None:
+                    annotated, recommendation = self._render(
+                        frame, detections, tracked_objects
+                    )
+
+                    # Speak recommendation
+                    if recommendation and self.debouncer.should_speak(recommendation):
+                        asyncio.create_task(self.tts.speak(
+                            recommendation,
+                            debounce_sec=self.config['speech']['debounce_sec']
+                        ))
+
+                    # Display
+                    cv2.imshow(window_name, annotated)
+
+                    # imshow has copied the frame, so its capture slot can be reused
+                    free_q.put_nowait(slot)
+
+                    # Update counters
+                    self.frame_count += 1
+
+                    # Calculate FPS
+                    now = time.time()
+                    if now - self.last_fps_time >= 1.0:
+                        self.fps = self.frame_count / (now - self.last_fps_time)
+                        self.frame_count = 0
+                        self.last_fps_time = now
+
+                # Handle keyboard (HighGUI stays on the main thread; macOS requires it)
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q') or key == 27:  # Q or ESC
+                    self.running = False
+                elif key == ord('p'):
+                    self.paused = not self.paused
+                    logger.info(f"{'Paused' if self.paused else 'Resumed'}")
+                elif key == ord('o'):
+                    self.show_overlay = not self.show_overlay
+                    logger.info(f"Overlay: {'ON' if self.show_overlay else 'OFF'}")
+        finally:
+            self.running = False
+            for stage in stages:
+                stage.cancel()
+            results = await asyncio.gather(*stages, return_exceptions=True)
+            for stage, result in zip(stages, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Pipeline stage '{stage.get_name()}' failed", exc_info=result)
+
+            cv2.destroyAllWindows()
+            await self._http.aclose()
 
-        cv2.destroyAllWindows()
         print("\n✓ Sonar Assist stopped")
 
     def on_key_press(self, key):
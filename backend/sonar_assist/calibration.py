@@ -9,6 +9,15 @@ import cv2
 import numpy as np
 import yaml
 
+# libyaml-backed loader when available; the pure-Python one is much slower
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+DEFAULT_DEPTH_MAP = {
+    'pix_top': 50,
+    'pix_bot': 650,
+    'ft_top': 0,
+    'ft_bot': 100
+}
 
 class DepthCalibrator:
     """Handles depth calibration by mapping pixel coordinates to depth in feet."""
@@ -18,43 +27,76 @@ class DepthCalibrator:
         self.config_path = config_path or self._get_default_config_path()
         self.calibration_data = self._load_calibration()
 
+    @property
+    def calibration_data(self) -> Dict:
+        """Current depth map (pix_top, pix_bot, ft_top, ft_bot)."""
+        return self._calibration_data
+
+    @calibration_data.setter
+    def calibration_data(self, data: Dict):
+        self._calibration_data = data
+        self._update_mapping()
+
+    def _update_mapping(self):
+        """Precompute the linear pixel-to-depth mapping from calibration_data."""
+        pix_top = self._calibration_data['pix_top']
+        pix_bot = self._calibration_data['pix_bot']
+        ft_top = self._calibration_data['ft_top']
+        ft_bot = self._calibration_data['ft_bot']
+
+        # Degenerate calibration maps every pixel to the top depth
+        if pix_bot == pix_top:
+            self._slope = 0.0
+        else:
+            self._slope = (ft_bot - ft_top) / (pix_bot - pix_top)
+        self._intercept = ft_top - self._slope * pix_top
+        self._ft_min, self._ft_max = sorted((ft_top, ft_bot))
+
     def _get_default_config_path(self) -> str:
         """Get default config file path."""
         module_dir = Path(__file__).parent
         return str(module_dir / "config" / "default.yaml")
 
+    @property
+    def sidecar_path(self) -> Path:
+        """JSON file holding the saved calibration next to the config file."""
+        return Path(self.config_path).with_suffix('.depth.json')
+
     def _load_calibration(self) -> Dict:
-        """Load existing calibration from config file."""
+        """
+        Load existing calibration.
+
+        A saved calibration sidecar wins unless the YAML config was edited
+        after it was written, so the YAML stays the editable source of truth.
+        """
+        sidecar = self.sidecar_path
+        try:
+            if sidecar.stat().st_mtime >= os.path.getmtime(self.config_path):
+                with open(sidecar, 'r') as f:
+                    depth_map = json.load(f)
+                if all(key in depth_map for key in DEFAULT_DEPTH_MAP):
+                    return depth_map
+        except (OSError, ValueError):
+            pass
+
         try:
             with open(self.config_path, 'r') as f:
-                config = yaml.safe_load(f)
-                return config.get('depth_map', {
-                    'pix_top': 50,
-                    'pix_bot': 650,
-                    'ft_top': 0,
-                    'ft_bot': 100
-                })
+                config = yaml.load(f, Loader=_YAML_LOADER)
+                return config.get('depth_map', dict(DEFAULT_DEPTH_MAP))
         except Exception as e:
             print(f"Warning: Could not load calibration: {e}")
-            return {
-                'pix_top': 50,
-                'pix_bot': 650,
-                'ft_top': 0,
-                'ft_bot': 100
-            }
+            return dict(DEFAULT_DEPTH_MAP)
 
     def _save_calibration(self):
-        """Save calibration to config file."""
+        """Save calibration atomically to the JSON sidecar."""
+        sidecar = self.sidecar_path
+        tmp_path = sidecar.with_suffix('.tmp')
         try:
-            with open(self.config_path, 'r') as f:
-                config = yaml.safe_load(f) or {}
-
-            config['depth_map'] = self.calibration_data
-
-            with open(self.config_path, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False)
+            with open(tmp_path, 'w') as f:
+                json.dump(self.calibration_data, f, indent=2)
+            os.replace(tmp_path, sidecar)
 
-            print(f"✓ Calibration saved to {self.config_path}")
+            print(f"✓ Calibration saved to {sidecar}")
         except Exception as e:
             print(f"Error saving calibration: {e}")
 
@@ -114,6 +156,7 @@ class DepthCalibrator:
             self.calibration_data['pix_bot'] = points[1][1]  # Y coordinate
             self.calibration_data['ft_top'] = top_depth
             self.calibration_data['ft_bot'] = bottom_depth
+            self._update_mapping()
 
             self._save_calibration()
 
@@ -140,19 +183,21 @@ class DepthCalibrator:
         Returns:
             Depth in feet
         """
-        pix_top = self.calibration_data['pix_top']
-        pix_bot = self.calibration_data['pix_bot']
-        ft_top = self.calibration_data['ft_top']
-        ft_bot = self.calibration_data['ft_bot']
+        depth = self._intercept + self._slope * pixel_y
+        return max(self._ft_min, min(self._ft_max, depth))
 
-        # Linear interpolation
-        if pix_bot == pix_top:
-            return ft_top
+    def pixel_to_depth_array(self, pixel_ys: np.ndarray) -> np.ndarray:
+        """
+        Convert many pixel Y coordinates to depth in feet at once.
 
-        ratio = (pixel_y - pix_top) / (pix_bot - pix_top)
-        depth = ft_top + ratio * (ft_bot - ft_top)
+        Args:
+            pixel_ys: Array of Y coordinates in pixels
 
-        return max(ft_top, min(ft_bot, depth))
+        Returns:
+            Array of depths in feet, clamped to the calibrated range
+        """
+        depths = self._intercept + self._slope * np.asarray(pixel_ys, dtype=np.float64)
+        return np.clip(depths, self._ft_min, self._ft_max)
 
     def depth_to_pixel(self, depth_ft: float) -> int:
         """
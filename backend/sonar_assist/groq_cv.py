@@ -5,15 +5,40 @@ import base64
 import io
 import logging
 import os
+import time
+from collections import OrderedDict
 from typing import Dict, Optional
 
-import aiohttp
 import cv2
+import httpx
 import numpy as np
 from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# Result cache for near-identical crops, keyed by perceptual hash
+RESULT_CACHE_TTL_SEC = 5.0
+RESULT_CACHE_MAX_ENTRIES = 256
+RESULT_CACHE_MAX_DISTANCE = 4  # Max Hamming distance between hashes for a hit
+
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=8)
+
+
+def dhash(frame_bgr: np.ndarray) -> int:
+    """
+    Compute a 64-bit difference hash of a frame.
+
+    Args:
+        frame_bgr: OpenCV BGR or grayscale frame
+
+    Returns:
+        Hash as an int; similar images differ in few bits
+    """
+    gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY) if frame_bgr.ndim == 3 else frame_bgr
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
 
 class GroqCV:
     """Client for Groq's free-tier vision model."""
@@ -24,6 +49,7 @@ class GroqCV:
         model_id: Optional[str] = None,
         endpoint: Optional[str] = None,
         timeout: int = 10,
+        http_client: Optional[httpx.AsyncClient] = None,
     ):
         """
         Initialize Groq CV client.
@@ -33,16 +59,55 @@ class GroqCV:
             model_id: Model identifier (defaults to llama-3.2-90b-vision-preview)
             endpoint: API endpoint URL
             timeout: Request timeout in seconds
+            http_client: Shared keep-alive client, closed by its owner. If
+                omitted, GroqCV opens its own on first use; close it with aclose()
         """
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
         self.model_id = model_id or "llama-3.2-90b-vision-preview"
         self.endpoint = endpoint or "https://api.groq.com/openai/v1/chat/completions"
         self.timeout = timeout
+        self._http = http_client
+        self._owns_http = http_client is None
         self.enabled = bool(self.api_key)
+        self._result_cache = OrderedDict()  # hash -> (time, result)
 
         if not self.enabled:
             logger.warning("Groq API key not found. Vision analysis will be disabled.")
 
+    def _client(self) -> httpx.AsyncClient:
+        """Get the HTTP client, opening an owned one on first use."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(http2=True, timeout=self.timeout, limits=HTTP_LIMITS)
+        return self._http
+
+    async def aclose(self):
+        """Close the HTTP client if GroqCV opened it; a shared client is left alone."""
+        if self._owns_http and self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _cache_lookup(self, key: int) -> Optional[Dict]:
+        """Return a fresh cached result whose hash is within the match distance."""
+        now = time.monotonic()
+        match = None
+        for cached_key, (cached_at, result) in list(self._result_cache.items()):
+            if now - cached_at >= RESULT_CACHE_TTL_SEC:
+                del self._result_cache[cached_key]
+            elif match is None and (cached_key ^ key).bit_count() <= RESULT_CACHE_MAX_DISTANCE:
+                match = cached_key
+
+        if match is None:
+            return None
+        self._result_cache.move_to_end(match)
+        return dict(self._result_cache[match][1])
+
+    def _cache_store(self, key: int, result: Dict):
+        """Cache a result, evicting the least recently used entry when full."""
+        self._result_cache[key] = (time.monotonic(), dict(result))
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > RESULT_CACHE_MAX_ENTRIES:
+            self._result_cache.popitem(last=False)
+
     def _encode_frame(self, frame_bgr: np.ndarray, max_size: int = 512) -> str:
         """
         Encode frame to base64 JPEG with resizing.
@@ -107,8 +172,13 @@ class GroqCV:
             x, y, w, h = crop
             frame_bgr = frame_bgr[y:y+h, x:x+w].copy()
 
-        # Encode frame
+        # Encode frame, unless a near-identical crop was answered recently
         try:
+            cache_key = dhash(frame_bgr)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
+
             image_data_uri = self._encode_frame(frame_bgr)
         except Exception as e:
             logger.error(f"Failed to encode frame: {e}")
@@ -158,26 +228,24 @@ Be conservative with fish classifications - only say "school" if you see clear a
 
         # Make request
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.endpoint,
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Groq API error {response.status}: {error_text}")
-                        return {
-                            "class": "unknown",
-                            "confidence": 0.0,
-                            "boxes": [],
-                            "reasoning": f"API error {response.status}"
-                        }
-
-                    result = await response.json()
-
-        except asyncio.TimeoutError:
+            response = await self._client().post(
+                self.endpoint,
+                json=payload,
+                headers=headers,
+                timeout=self.timeout
+            )
+            if response.status_code != 200:
+                logger.error(f"Groq API error {response.status_code}: {response.text}")
+                return {
+                    "class": "unknown",
+                    "confidence": 0.0,
+                    "boxes": [],
+                    "reasoning": f"API error {response.status_code}"
+                }
+
+            result = response.json()
+
+        except httpx.TimeoutException:
             logger.warning("Groq API request timed out")
             return {
                 "class": "unknown",
@@ -197,7 +265,7 @@ Be conservative with fish classifications - only say "school" if you see clear a
         # Parse response
         try:
             content = result["choices"][0]["message"]["content"]
-            return self._parse_response(content)
+            parsed = self._parse_response(content)
         except (KeyError, IndexError) as e:
             logger.error(f"Failed to parse Groq response: {e}")
             return {
@@ -207,6 +275,9 @@ Be conservative with fish classifications - only say "school" if you see clear a
                 "reasoning": "Parse error"
             }
 
+        self._cache_store(cache_key, parsed)
+        return parsed
+
     def _parse_response(self, content: str) -> Dict:
         """
         Parse structured response from model.
@@ -302,7 +373,10 @@ async def test_groq_cv():
         return
 
     print("Testing Groq CV analysis...")
-    result = await client.analyze(test_frame)
+    try:
+        result = await client.analyze(test_frame)
+    finally:
+        await client.aclose()
 
     print(f"\nResult:")
     print(f"  Class: {result['class']}")
@@ -33,12 +33,13 @@ class Detection:
 
     def to_dict(self) -> Dict:
         """Convert to dictionary for logging."""
+        # Plain Python numbers so the record serializes without numpy scalars
         return {
-            'bbox': self.bbox,
-            'area': self.area,
-            'density': self.density,
-            'tightness': self.tightness,
-            'centroid': self.centroid,
+            'bbox': tuple(int(v) for v in self.bbox),
+            'area': float(self.area),
+            'density': float(self.density),
+            'tightness': float(self.tightness),
+            'centroid': tuple(float(v) for v in self.centroid),
         }
 
 
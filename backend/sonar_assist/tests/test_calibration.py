@@ -1,8 +1,12 @@
 """Tests for calibration module."""
 
+import os
 import sys
+import tempfile
 from pathlib import Path
 
+import numpy as np
+
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -132,6 +136,84 @@ def test_inverse_operations():
     print("✓ test_inverse_operations passed")
 
 
+def test_pixel_to_depth_array():
+    """Test batched conversion matches the scalar version."""
+    calibrator = DepthCalibrator()
+
+    calibrator.calibration_data = {
+        'pix_top': 50,
+        'pix_bot': 650,
+        'ft_top': 0,
+        'ft_bot': 100
+    }
+
+    pixels = np.array([-10, 50, 200, 350, 650, 900])
+    depths = calibrator.pixel_to_depth_array(pixels)
+
+    assert depths.shape == pixels.shape
+    for pixel, depth in zip(pixels, depths):
+        assert abs(depth - calibrator.pixel_to_depth(int(pixel))) < 1e-9
+
+    # Clamped to calibrated range
+    assert depths[0] == 0
+    assert depths[-1] == 100
+
+    print("✓ test_pixel_to_depth_array passed")
+
+
+def test_recalibration_updates_mapping():
+    """Test that replacing calibration data changes the mapping."""
+    calibrator = DepthCalibrator()
+
+    calibrator.calibration_data = {
+        'pix_top': 0,
+        'pix_bot': 100,
+        'ft_top': 0,
+        'ft_bot': 100
+    }
+    assert calibrator.pixel_to_depth(50) == 50
+
+    calibrator.calibration_data = {
+        'pix_top': 0,
+        'pix_bot': 100,
+        'ft_top': 0,
+        'ft_bot': 200
+    }
+    assert calibrator.pixel_to_depth(50) == 100
+
+    print("✓ test_recalibration_updates_mapping passed")
+
+
+def test_save_and_reload_calibration():
+    """Test that saved calibration is reloaded from the sidecar."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_path = Path(tmp_dir) / "config.yaml"
+        config_path.write_text("depth_map:\n  pix_top: 50\n  pix_bot: 650\n  ft_top: 0\n  ft_bot: 100\n")
+
+        calibrator = DepthCalibrator(str(config_path))
+        calibrator.calibration_data = {
+            'pix_top': 10,
+            'pix_bot': 210,
+            'ft_top': 5,
+            'ft_bot': 45
+        }
+        calibrator._save_calibration()
+
+        # YAML config is left untouched
+        assert "pix_top: 50" in config_path.read_text()
+
+        reloaded = DepthCalibrator(str(config_path))
+        assert reloaded.calibration_data['pix_bot'] == 210
+        assert reloaded.pixel_to_depth(110) == 25
+
+        # Editing the YAML after calibrating makes it authoritative again
+        sidecar_mtime = calibrator.sidecar_path.stat().st_mtime
+        os.utime(config_path, (sidecar_mtime + 10, sidecar_mtime + 10))
+        assert DepthCalibrator(str(config_path)).calibration_data['pix_bot'] == 650
+
+    print("✓ test_save_and_reload_calibration passed")
+
+
 def run_all_tests():
     """Run all test functions."""
     print("\n" + "=" * 60)
@@ -144,6 +226,9 @@ def run_all_tests():
     test_non_linear_calibration()
     test_get_depth_range()
     test_inverse_operations()
+    test_pixel_to_depth_array()
+    test_recalibration_updates_mapping()
+    test_save_and_reload_calibration()
 
     print("\n" + "=" * 60)
     print("✓ All tests passed!")
@@ -0,0 +1,90 @@
+"""Tests for Groq CV result caching."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import groq_cv
+from groq_cv import GroqCV, dhash
+
+
+def _gradient_frame(offset: int = 0) -> np.ndarray:
+    """Create a BGR frame with a horizontal gradient and a bright blob."""
+    frame = np.tile(np.linspace(0, 200, 120, dtype=np.uint8), (80, 1))
+    frame[30:50, 40 + offset:70 + offset] = 255
+    return np.dstack([frame, frame, frame])
+
+
+def test_dhash_similarity():
+    """Test that similar frames hash close together and different ones do not."""
+    base = dhash(_gradient_frame())
+    noisy = _gradient_frame().astype(np.int16) + np.random.default_rng(0).integers(-2, 3, (80, 120, 3))
+    near = dhash(np.clip(noisy, 0, 255).astype(np.uint8))
+    far = dhash(np.fliplr(_gradient_frame()).copy())
+
+    assert 0 <= base < 2 ** 64
+    assert (base ^ near).bit_count() <= groq_cv.RESULT_CACHE_MAX_DISTANCE
+    assert (base ^ far).bit_count() > groq_cv.RESULT_CACHE_MAX_DISTANCE
+
+    print("✓ test_dhash_similarity passed")
+
+
+def test_result_cache_hit_and_expiry():
+    """Test cache lookups by nearby hash and TTL expiry."""
+    client = GroqCV(api_key="test")
+    result = {"class": "school", "confidence": 0.8, "boxes": [], "reasoning": "arches"}
+
+    client._cache_store(0b1011, result)
+
+    assert client._cache_lookup(0b1011) == result
+    assert client._cache_lookup(0b0011) == result  # 1 bit away
+    assert client._cache_lookup(0b1011 ^ 0b11111) is None  # 5 bits away
+
+    # Returned results are copies
+    client._cache_lookup(0b1011)["class"] = "debris"
+    assert client._cache_lookup(0b1011)["class"] == "school"
+
+    # Expired entries are dropped
+    cached_at, cached = client._result_cache[0b1011]
+    client._result_cache[0b1011] = (cached_at - groq_cv.RESULT_CACHE_TTL_SEC, cached)
+    assert client._cache_lookup(0b1011) is None
+    assert len(client._result_cache) == 0
+
+    print("✓ test_result_cache_hit_and_expiry passed")
+
+
+def test_result_cache_eviction():
+    """Test that the cache keeps only the most recently used entries."""
+    client = GroqCV(api_key="test")
+    result = {"class": "unknown", "confidence": 0.0, "boxes": [], "reasoning": ""}
+
+    for i in range(groq_cv.RESULT_CACHE_MAX_ENTRIES + 1):
+        client._cache_store(i << 32, result)
+
+    assert len(client._result_cache) == groq_cv.RESULT_CACHE_MAX_ENTRIES
+    assert 0 not in client._result_cache
+
+    print("✓ test_result_cache_eviction passed")
+
+
+def run_all_tests():
+    """Run all test functions."""
+    print("\n" + "=" * 60)
+    print("Running Groq CV Module Tests")
+    print("=" * 60 + "\n")
+
+    test_dhash_similarity()
+    test_result_cache_hit_and_expiry()
+    test_result_cache_eviction()
+
+    print("\n" + "=" * 60)
+    print("✓ All tests passed!")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    run_all_tests()
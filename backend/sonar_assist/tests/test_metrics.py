@@ -38,6 +38,25 @@ def test_detection_creation():
     print("✓ test_detection_creation passed")
 
 
+def test_detection_to_dict_native_types():
+    """Test to_dict returns plain Python numbers, not numpy scalars."""
+    det = Detection(
+        bbox=(np.int32(10), np.int32(20), np.int32(30), np.int32(40)),
+        area=np.float64(1200),
+        density=np.float64(150.5),
+        tightness=np.float32(0.8),
+        centroid=(np.float64(25.0), np.float64(40.0))
+    )
+
+    d = det.to_dict()
+    assert d['bbox'] == (10, 20, 30, 40)
+    assert all(type(v) is int for v in d['bbox'])
+    assert all(type(d[k]) is float for k in ('area', 'density', 'tightness'))
+    assert all(type(v) is float for v in d['centroid'])
+
+    print("✓ test_detection_to_dict_native_types passed")
+
+
 def test_preprocess_frame():
     """Test frame preprocessing."""
     # Create test frame
@@ -144,6 +163,7 @@ def run_all_tests():
     print("=" * 60 + "\n")
 
     test_detection_creation()
+    test_detection_to_dict_native_types()
     test_preprocess_frame()
     test_detect_fish()
     test_classify_density()
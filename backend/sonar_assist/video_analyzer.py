@@ -2,9 +2,11 @@
 
 import asyncio
 import logging
+import queue
 import sys
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
 import cv2
 import numpy as np
@@ -26,6 +28,62 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class FramePrefetcher:
+    """Decode frames on a background thread into a fixed ring of reusable buffers."""
+
+    def __init__(self, cap: cv2.VideoCapture, num_slots: int = 4):
+        """
+        Start decoding ahead of the consumer.
+
+        Args:
+            cap: Opened video capture to read from
+            num_slots: Frame buffers in the ring (bounds decode-ahead)
+        """
+        self._cap = cap
+        self._slots: List[Optional[np.ndarray]] = [None] * num_slots
+        self._free: queue.Queue = queue.Queue()
+        self._filled: queue.Queue = queue.Queue()
+        for idx in range(num_slots):
+            self._free.put(idx)
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._decode, daemon=True)
+        self._thread.start()
+
+    def _decode(self):
+        """Fill free slots in place until the video ends or close() is called."""
+        try:
+            while not self._stop.is_set():
+                idx = self._free.get()
+                if idx is None:
+                    break
+                # cv2 decodes straight into the slot's buffer once it exists
+                ret, frame = self._cap.read(self._slots[idx])
+                if not ret:
+                    break
+                self._slots[idx] = frame
+                self._filled.put(idx)
+        finally:
+            self._filled.put(None)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        """
+        Yield decoded frames in order.
+
+        A frame's buffer is recycled as soon as the next one is requested,
+        so callers must copy anything they keep past the current iteration.
+        """
+        while (idx := self._filled.get()) is not None:
+            yield self._slots[idx]
+            self._free.put(idx)
+
+    def close(self):
+        """Stop the decoder thread; call before releasing the capture."""
+        self._stop.set()
+        self._free.put(None)
+        self._thread.join()
+
+
 class VideoSonarAnalyzer:
     """Analyze sonar videos frame by frame."""
 
@@ -114,12 +172,11 @@ class VideoSonarAnalyzer:
         all_detections = []
         frame_idx = 0
 
-        try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
+        # Decode the next frames while the current one is being analyzed
+        frames = FramePrefetcher(cap)
 
+        try:
+            for frame in frames:
                 frame_idx += 1
                 logger.info(f"Processing frame {frame_idx}/{total_frames}")
 
@@ -149,7 +206,9 @@ class VideoSonarAnalyzer:
                     logger.info(f"Progress: {frame_idx}/{total_frames} ({100*frame_idx/total_frames:.1f}%)")
 
         finally:
+            frames.close()
             cap.release()
+            await self.groq_cv.aclose()
             if writer:
                 writer.release()
                 logger.info(f"✓ Annotated video saved to: {output_path}")
@@ -299,6 +358,31 @@ class VideoSonarAnalyzer:
         return annotated
 
 
+def analyze_video_file(
+    video_path: str,
+    output_path: Optional[str] = None,
+    enable_tts: bool = False,
+    enable_groq: bool = True,
+    config_path: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Synchronous entry point for running an analysis in a worker process.
+
+    Builds a fresh analyzer (so tracker state is never shared between videos)
+    and drives its event loop until the video is fully processed.
+
+    Returns:
+        List of detection dictionaries per frame
+    """
+    analyzer = VideoSonarAnalyzer(config_path)
+    return asyncio.run(analyzer.analyze_video(
+        video_path=video_path,
+        output_path=output_path,
+        enable_tts=enable_tts,
+        enable_groq=enable_groq,
+    ))
+
+
 async def main():
     """CLI for video analysis."""
     if len(sys.argv) < 2:
@@ -0,0 +1,108 @@
+"""Tests for freshness service micro-batching."""
+
+import asyncio
+import os
+import sys
+import warnings
+from pathlib import Path
+from types import SimpleNamespace
+
+import orjson
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+from services.freshness_service import FreshnessService
+
+
+class FakeModel:
+    """Answers each Gemini call with one assessment per image, tagged by image bytes."""
+
+    def __init__(self, drop_one: bool = False):
+        self.calls = []
+        self.drop_one = drop_one
+
+    async def generate_content_async(self, contents, generation_config=None):
+        images = [part["data"] for part in contents[1:]]
+        self.calls.append(images)
+        analysis = [{"image": image.decode()} for image in images]
+        if self.drop_one:
+            analysis.pop()
+        if len(images) == 1:
+            analysis = analysis[0] if analysis else {}
+        return SimpleNamespace(text=orjson.dumps(analysis))
+
+
+def _service(model):
+    service = FreshnessService()
+    service.model = model
+    return service
+
+
+def test_batch_demultiplexes_results():
+    """Test that concurrent images share one call and each gets its own result."""
+    model = FakeModel()
+    service = _service(model)
+
+    async def run():
+        return await asyncio.gather(*(service._analyze_batched(name) for name in (b"a", b"b", b"c")))
+
+    results = asyncio.run(run())
+
+    assert results == [{"image": "a"}, {"image": "b"}, {"image": "c"}]
+    assert model.calls == [[b"a", b"b", b"c"]]
+
+    print("✓ test_batch_demultiplexes_results passed")
+
+
+def test_single_image_batch():
+    """Test that a lone image is sent on its own and its object unwrapped."""
+    model = FakeModel()
+    service = _service(model)
+
+    result = asyncio.run(service._analyze_batched(b"solo"))
+
+    assert result == {"image": "solo"}
+    assert model.calls == [[b"solo"]]
+
+    print("✓ test_single_image_batch passed")
+
+
+def test_batch_length_mismatch_fails_every_caller():
+    """Test that a short batch reply raises for every waiting image."""
+    service = _service(FakeModel(drop_one=True))
+
+    async def run():
+        return await asyncio.gather(
+            *(service._analyze_batched(name) for name in (b"a", b"b")),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert len(results) == 2
+    assert all(isinstance(result, ValueError) for result in results)
+
+    print("✓ test_batch_length_mismatch_fails_every_caller passed")
+
+
+def run_all_tests():
+    """Run all test functions."""
+    print("\n" + "=" * 60)
+    print("Running Freshness Service Tests")
+    print("=" * 60 + "\n")
+
+    test_batch_demultiplexes_results()
+    test_single_image_batch()
+    test_batch_length_mismatch_fails_every_caller()
+
+    print("\n" + "=" * 60)
+    print("✓ All tests passed!")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    run_all_tests()
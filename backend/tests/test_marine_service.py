@@ -0,0 +1,112 @@
+"""Tests for marine service forecast caching."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services import marine_service
+from services.marine_service import MarineService
+
+FORECAST = {
+    "current": {"temperature_2m": 60.0, "wind_speed_10m": 10.0, "wind_direction_10m": 315},
+    "hourly": {"time": [], "temperature_2m": [], "wind_speed_10m": [], "wind_direction_10m": [], "wind_gusts_10m": []},
+}
+
+
+def _service(status_code: int = 200):
+    """MarineService backed by a mock transport that counts upstream requests."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(status_code, json=FORECAST)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return MarineService(http_client=client), requests
+
+
+def test_concurrent_fetches_share_one_request():
+    """Test that concurrent misses for one cell make a single upstream call."""
+    service, requests = _service()
+
+    async def run():
+        return await asyncio.gather(
+            service._fetch_all(34.0195, -118.4912),
+            service._fetch_all(34.0195, -118.4912),
+            service._fetch_all(34.0201, -118.4878),  # same ~1 km cell
+        )
+
+    results = asyncio.run(run())
+
+    assert len(requests) == 1
+    assert all(result == FORECAST for result in results)
+    assert service._pending == {}
+
+    print("✓ test_concurrent_fetches_share_one_request passed")
+
+
+def test_cache_hit_and_expiry():
+    """Test that cached forecasts are reused until FORECAST_CACHE_TTL_SEC passes."""
+    service, requests = _service()
+
+    asyncio.run(service._fetch_all(34.0195, -118.4912))
+    asyncio.run(service._fetch_all(34.0195, -118.4912))
+    assert len(requests) == 1
+
+    # A different cell misses
+    asyncio.run(service._fetch_all(36.6, -121.9))
+    assert len(requests) == 2
+
+    key = (34.02, -118.49)
+    fetched_at, data = service._cache[key]
+    service._cache[key] = (fetched_at - marine_service.FORECAST_CACHE_TTL_SEC, data)
+    asyncio.run(service._fetch_all(34.0195, -118.4912))
+    assert len(requests) == 3
+
+    print("✓ test_cache_hit_and_expiry passed")
+
+
+def test_failed_fetch_is_not_cached():
+    """Test that upstream errors reach every caller and are retried next time."""
+    service, requests = _service(status_code=500)
+
+    async def run():
+        return await asyncio.gather(
+            service._fetch_all(34.0195, -118.4912),
+            service._fetch_all(34.0195, -118.4912),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert len(requests) == 1
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+    assert service._cache == {}
+    assert service._pending == {}
+
+    print("✓ test_failed_fetch_is_not_cached passed")
+
+
+def run_all_tests():
+    """Run all test functions."""
+    print("\n" + "=" * 60)
+    print("Running Marine Service Tests")
+    print("=" * 60 + "\n")
+
+    test_concurrent_fetches_share_one_request()
+    test_cache_hit_and_expiry()
+    test_failed_fetch_is_not_cached()
+
+    print("\n" + "=" * 60)
+    print("✓ All tests passed!")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    run_all_tests()
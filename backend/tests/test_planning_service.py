@@ -0,0 +1,172 @@
+"""Tests for planning service JSON streaming and plan caches."""
+
+import asyncio
+import sys
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+from google.generativeai import protos
+from google.generativeai.types.generation_types import AsyncGenerateContentResponse
+
+from models.schemas import LocationModel, PlanRequest
+from services import planning_service
+from services.planning_service import (
+    PlanningService,
+    _cache_get,
+    _cache_put,
+    _JsonObjectTracker,
+    _plan_cache_key,
+)
+
+
+def _feed_all(chunks):
+    """Feed chunks in order and return (chunk index, offset) of the closing brace."""
+    tracker = _JsonObjectTracker()
+    for i, chunk in enumerate(chunks):
+        end = tracker.feed(chunk)
+        if end >= 0:
+            return i, end
+    return None
+
+
+def _stream_model(texts, closed):
+    """Fake Gemini model whose streamed reply records when its RPC iterator closes."""
+    async def rpc():
+        try:
+            for text in texts:
+                yield protos.GenerateContentResponse(
+                    candidates=[{"content": {"parts": [{"text": text}]}}]
+                )
+        finally:
+            closed.append(True)
+
+    class FakeModel:
+        async def generate_content_async(self, prompt, generation_config=None, stream=False):
+            assert stream
+            return await AsyncGenerateContentResponse.from_aiterator(rpc())
+
+    return FakeModel()
+
+
+def _bare_service(model):
+    # Skip __init__, which needs credentials and a marine service
+    service = PlanningService.__new__(PlanningService)
+    service.model = model
+    service._gemini_sem = asyncio.Semaphore(1)
+    return service
+
+
+def test_tracker_single_chunk():
+    """Test that the tracker finds the end of a complete object."""
+    text = '{"a": {"b": 1}} trailing'
+    assert _feed_all([text]) == (0, text.index(" trailing"))
+
+    print("✓ test_tracker_single_chunk passed")
+
+
+def test_tracker_split_across_chunks():
+    """Test that nesting depth carries over between chunks."""
+    assert _feed_all(['{"a": {', '"b": 1', '}', '} extra']) == (3, 1)
+    assert _feed_all(['{"a": ', '1']) is None
+
+    print("✓ test_tracker_split_across_chunks passed")
+
+
+def test_tracker_ignores_braces_in_strings():
+    """Test that braces and escaped quotes inside strings don't change depth."""
+    text = '{"note": "use } and { \\" here"}'
+    assert _feed_all([text]) == (0, len(text))
+
+    # Escape at the very end of one chunk applies to the next chunk's quote
+    assert _feed_all(['{"note": "a\\', '"}', '"}']) == (2, 2)
+
+    print("✓ test_tracker_ignores_braces_in_strings passed")
+
+
+def test_generate_json_stops_and_closes_stream():
+    """Test that streaming stops at the closing brace and the RPC is closed."""
+    closed = []
+    service = _bare_service(_stream_model(['{"a": ', '1} ', 'ignored', 'also ignored'], closed))
+
+    async def run():
+        result = await service._generate_json("prompt", {})
+        # Checked before asyncio.run finalizes leftover generators itself
+        return result, list(closed)
+
+    result, closed_on_return = asyncio.run(run())
+
+    assert result == '{"a": 1}'
+    assert closed_on_return == [True]
+
+    print("✓ test_generate_json_stops_and_closes_stream passed")
+
+
+def test_plan_cache_key_quantizes():
+    """Test that nearby requests in the same hour share a cache key."""
+    now = datetime(2025, 6, 1, 5, 42, 10)
+    first = PlanRequest(
+        location=LocationModel(lat=34.0195, lng=-118.4912),
+        target_species=["lingcod", "rockfish"],
+        trip_duration=6,
+    )
+    nearby = PlanRequest(
+        location=LocationModel(lat=34.0201, lng=-118.4878),
+        target_species=["rockfish", "lingcod"],
+        trip_duration=6,
+    )
+
+    assert _plan_cache_key(first, now) == _plan_cache_key(nearby, now.replace(minute=3))
+    assert _plan_cache_key(first, now) != _plan_cache_key(first, now.replace(hour=6))
+    assert _plan_cache_key(first, now) != _plan_cache_key(
+        first.model_copy(update={"trip_duration": 8}), now
+    )
+
+    print("✓ test_plan_cache_key_quantizes passed")
+
+
+def test_cache_expiry_and_eviction():
+    """Test TTL expiry and oldest-first eviction of plan caches."""
+    cache = {}
+    _cache_put(cache, "key", {"plan": 1})
+    assert _cache_get(cache, "key", planning_service.PLAN_CACHE_TTL_SEC) == {"plan": 1}
+
+    # Expired entries are dropped
+    cached_at, value = cache["key"]
+    cache["key"] = (cached_at - planning_service.PLAN_CACHE_TTL_SEC, value)
+    assert _cache_get(cache, "key", planning_service.PLAN_CACHE_TTL_SEC) is None
+    assert "key" not in cache
+
+    for i in range(planning_service.PLAN_CACHE_MAX_ENTRIES + 1):
+        _cache_put(cache, i, i)
+    assert len(cache) == planning_service.PLAN_CACHE_MAX_ENTRIES
+    assert 0 not in cache
+
+    print("✓ test_cache_expiry_and_eviction passed")
+
+
+def run_all_tests():
+    """Run all test functions."""
+    print("\n" + "=" * 60)
+    print("Running Planning Service Tests")
+    print("=" * 60 + "\n")
+
+    test_tracker_single_chunk()
+    test_tracker_split_across_chunks()
+    test_tracker_ignores_braces_in_strings()
+    test_generate_json_stops_and_closes_stream()
+    test_plan_cache_key_quantizes()
+    test_cache_expiry_and_eviction()
+
+    print("\n" + "=" * 60)
+    print("✓ All tests passed!")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    run_all_tests()
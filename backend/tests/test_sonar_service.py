@@ -0,0 +1,116 @@
+"""Tests for sonar service reply parsing and image decoding."""
+
+import base64
+import sys
+import warnings
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+from services.sonar_service import SonarService
+
+REPLY = """Here is my analysis.
+FISH_ARCHES: 12
+DEPTH: ~45 feet
+DENSITY: Dense school near the bottom
+WIDTH: 30 feet wide
+BOTTOM_STRUCTURE: Yes
+BOTTOM_TYPE: Rocky
+BOTTOM_DEPTH: 120 ft
+THERMOCLINE: none
+  fish_size: Medium\r
+FISH_BEHAVIOR: Schooling
+BAITFISH_PRESENT: no
+SPECIES_GUESS: Rockfish or lingcod
+CONFIDENCE: 0.82
+RECOMMENDATION: Set the gillnet at 40 ft on the up-current edge.
+"""
+
+
+def test_parse_structured_reply():
+    """Test that every field is converted by its handler."""
+    parsed = SonarService()._parse_sonar_response(REPLY)
+
+    assert parsed == {
+        "fish_arches": 12,
+        "depth": 45,
+        "density": "dense",
+        "width": "30 ft",
+        "bottom_structure": True,
+        "bottom_type": "rocky",
+        "bottom_depth": 120,
+        "thermocline": None,
+        "fish_size": "medium",
+        "fish_behavior": "schooling",
+        "baitfish_present": False,
+        "species_guess": "Rockfish or lingcod",
+        "confidence": 0.82,
+        "recommendation": "Set the gillnet at 40 ft on the up-current edge.",
+    }
+
+    print("✓ test_parse_structured_reply passed")
+
+
+def test_parse_malformed_values():
+    """Test fallbacks for unparseable values and missing fields."""
+    parsed = SonarService()._parse_sonar_response(
+        "FISH_ARCHES: several\nDEPTH: unknown\nTHERMOCLINE: around 60ft\nCONFIDENCE: high\nWIDTH:\n"
+    )
+
+    assert parsed == {
+        "fish_arches": 0,
+        "depth": 0,
+        "thermocline": 60,
+        "confidence": 0.5,
+        "width": "unknown",
+    }
+    assert SonarService()._parse_sonar_response("No structured fields here") == {}
+
+    print("✓ test_parse_malformed_values passed")
+
+
+def test_prepare_image_parts():
+    """Test mime type detection and decoding for each data URI form."""
+    service = SonarService()
+    payload = b"\x89PNG fake image bytes"
+    encoded = base64.b64encode(payload).decode("ascii")
+
+    assert service._prepare_image_parts(f"data:image/png;base64,{encoded}") == (
+        {"mime_type": "image/png", "data": payload},
+    )
+    assert service._prepare_image_parts(f"data:image/jpeg;base64,{encoded}") == (
+        {"mime_type": "image/jpeg", "data": payload},
+    )
+    assert service._prepare_image_parts(encoded) == ({"mime_type": "image/png", "data": payload},)
+
+    for bad in ("data:image/png", "data:image/png;base64,abc", "not base64 ü"):
+        try:
+            service._prepare_image_parts(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{bad!r} should be rejected")
+
+    print("✓ test_prepare_image_parts passed")
+
+
+def run_all_tests():
+    """Run all test functions."""
+    print("\n" + "=" * 60)
+    print("Running Sonar Service Tests")
+    print("=" * 60 + "\n")
+
+    test_parse_structured_reply()
+    test_parse_malformed_values()
+    test_prepare_image_parts()
+
+    print("\n" + "=" * 60)
+    print("✓ All tests passed!")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    run_all_tests()